@@ -19,13 +19,37 @@ If y is a node in the right subtree of x, then y.key >= x.key
 7. Predecessor(S, x) : O(h)
 
 - Advanced Operation:
-1. InOrderTraversal(S, x)
-2. PreOrderTraversal(S, x)
-3. PostOrderTraversal(S, x)
+# traversals are generators with an explicit stack, so they work on degenerate trees of any height
+1. InOrderTraversal(S, x) : O(n), O(h) extra space
+2. PreOrderTraversal(S, x) : O(n), O(h) extra space
+3. PostOrderTraversal(S, x) : O(n), O(h) extra space
+4. Range(S, lo, hi) : O(h + k) for k nodes with lo <= key <= hi, O(1) extra space
+5. Build(S, items) : bulk load into a perfectly balanced tree, O(n) if items are sorted by key ; otherwise O(nlog(n))
+6. Merge(S, T) : move all nodes of T into S through in-order streams, O(n + m)
+
+- Red-black tree (RBTree)
+# Every node is either red or black, the root and the sentinel are black,
+# a red node has no red child, and all paths from a node to its external leaves contain the same number of black nodes
+# => h <= 2 * log(n + 1), so all the basic operations above are guaranteed O(log(n))
+# RBTree shares the Node/sentinel API with BST but expects RBNode (a Node with a color attribute)
+
+- Order-statistic tree (OSTree)
+# Red-black tree augmented with x.size, the number of nodes in the subtree rooted at x
+1. Select(S, k) : return the k-th smallest node (0-based), O(log(n))
+2. Rank(S, k) : return the number of nodes whose key is smaller than k, O(log(n))
+3. CountRange(S, lo, hi) : return the number of nodes with lo <= key <= hi, O(log(n))
+
+- Memory layout
+# Node classes use __slots__ instead of a per-instance __dict__
+# ArrayBST stores the nodes as parallel typed arrays (struct of arrays) and addresses them by integer handles
 """
 
+import heapq
+
 # Universal Implementation
 class Node:
+	__slots__ = ("key", "val", "p", "left", "right") # no per-instance __dict__
+
 	def __init__(self, key=None, val=None):
 		self.key = key
 		self.val = val
@@ -34,10 +58,52 @@ class Node:
 		self.right = self
 
 class BST:
+	node_type = Node
+
 	def __init__(self):
-		self.nil = Node()
+		self.nil = self.node_type()
 		self.root = self.nil
 
+	@classmethod
+	def from_items(cls, items):
+		tree = cls()
+		tree.build(items)
+		return tree
+
+	def build(self, items):
+		# bulk load (key, val) pairs into a perfectly balanced tree, replacing the current content
+		# O(n) if items are sorted by key ; otherwise they are sorted first, O(nlog(n))
+		nodes = [self.node_type(key, val) for key, val in items]
+		if any(nodes[i + 1].key < nodes[i].key for i in range(len(nodes) - 1)):
+			nodes.sort(key=lambda x: x.key)
+		self.link(nodes)
+
+	def merge(self, other):
+		# move all nodes of other into self by merging both in-order streams ; O(n + m)
+		# other becomes empty and the result is perfectly balanced
+		nodes = list(heapq.merge(self.inorder(), other.inorder(), key=lambda x: x.key))
+		other.root = other.nil
+		self.link(nodes)
+
+	def link(self, nodes):
+		# link nodes sorted by key into a perfectly balanced tree ; O(n)
+		height = len(nodes).bit_length() - 1 # depth of the deepest level
+		def link(lo, hi, p, depth):
+			if lo > hi:
+				return self.nil
+			mid = (lo + hi) // 2
+			x = nodes[mid]
+			x.p = p
+			x.left = link(lo, mid - 1, x, depth + 1)
+			x.right = link(mid + 1, hi, x, depth + 1)
+			self.annotate(x, depth, height)
+			return x
+		self.root = link(0, len(nodes) - 1, self.nil, 0)
+
+	def annotate(self, x, depth, height):
+		# hook for augmented trees, called on each node by link() after both of its subtrees are linked
+		pass
+
 	def insert(self, x):
 		prev = self.nil
 		curr = self.root
@@ -62,9 +128,9 @@ class BST:
 
 	def delete(self, x):
 		# most complicated operation
-		if not x.left:
+		if x.left is self.nil:
 			self.transplant(x, x.right)
-		elif not x.right:
+		elif x.right is self.nil:
 			self.transplant(x, x.left)
 		else:
 			nex = self.minimum(x.right) # successor must be in the subtree of x, since both children exist
@@ -131,7 +197,7 @@ class BST:
 
 	def predecessor(self, x):
 		if x.left is not self.nil:
-			return self.maximum(x.right)
+			return self.maximum(x.left)
 		else:
 			curr = x
 			while curr is not self.root:
@@ -141,29 +207,527 @@ class BST:
 					curr = curr.p
 		raise Exception("no predecessor")
 
-	def inorder(self, x):
-		# In-order traversal among subtree rooted at x
-		if x is self.nil:
-			return
+	def inorder(self, x=None):
+		# In-order traversal among subtree rooted at x (default : root), yielding nodes lazily
+		# explicit stack of O(h) instead of recursion, so degenerate trees don't hit the recursion limit
+		stack = []
+		curr = self.root if x is None else x
+		while stack or curr is not self.nil:
+			if curr is not self.nil:
+				stack.append(curr)
+				curr = curr.left
+			else:
+				curr = stack.pop()
+				yield curr
+				curr = curr.right
+
+	def preorder(self, x=None):
+		# Pre-order traversal among subtree rooted at x (default : root), yielding nodes lazily
+		curr = self.root if x is None else x
+		stack = [curr] if curr is not self.nil else []
+		while stack:
+			curr = stack.pop()
+			yield curr
+			if curr.right is not self.nil:
+				stack.append(curr.right)
+			if curr.left is not self.nil:
+				stack.append(curr.left)
+
+	def postorder(self, x=None):
+		# Post-order traversal among subtree rooted at x (default : root), yielding nodes lazily
+		stack = []
+		last = self.nil # last yielded node
+		curr = self.root if x is None else x
+		while stack or curr is not self.nil:
+			if curr is not self.nil:
+				stack.append(curr)
+				curr = curr.left
+			else:
+				top = stack[-1]
+				if top.right is not self.nil and top.right is not last:
+					curr = top.right
+				else:
+					last = stack.pop()
+					yield last
+
+	def __iter__(self):
+		return self.inorder()
+
+	def range(self, lo, hi):
+		# yield nodes with lo <= key <= hi in order ; O(h) seek to lo then O(1) memory per step via parent pointers
+		curr = self.root
+		start = self.nil
+		while curr is not self.nil:
+			if curr.key < lo:
+				curr = curr.right
+			else:
+				start = curr # candidate : smallest key >= lo seen so far
+				curr = curr.left
+		curr = start
+		while curr is not self.nil and not hi < curr.key:
+			yield curr
+			if curr.right is not self.nil:
+				curr = self.minimum(curr.right)
+			else:
+				while curr is not self.root and curr is curr.p.right:
+					curr = curr.p
+				curr = self.nil if curr is self.root else curr.p
+
+
+# Red-black Tree Implementation
+RED = 0
+BLACK = 1
+
+class RBNode(Node):
+	__slots__ = ("color",)
+
+	def __init__(self, key=None, val=None):
+		super().__init__(key, val)
+		self.color = BLACK
+
+class RBTree(BST):
+	node_type = RBNode # sentinel node is always black
+
+	def annotate(self, x, depth, height):
+		# all external leaves of a linked tree lie within the deepest two levels,
+		# so coloring the deepest level red leaves every path with the same black height
+		x.color = RED if depth == height and depth > 0 else BLACK
+
+	def left_rotate(self, x):
+		# x.right must not be self.nil
+		y = x.right
+		x.right = y.left
+		if y.left is not self.nil:
+			y.left.p = x
+		y.p = x.p
+		if x.p is self.nil:
+			self.root = y
+		elif x is x.p.left:
+			x.p.left = y
+		else:
+			x.p.right = y
+		y.left = x
+		x.p = y
+
+	def right_rotate(self, x):
+		# x.left must not be self.nil
+		y = x.left
+		x.left = y.right
+		if y.right is not self.nil:
+			y.right.p = x
+		y.p = x.p
+		if x.p is self.nil:
+			self.root = y
+		elif x is x.p.right:
+			x.p.right = y
+		else:
+			x.p.left = y
+		y.right = x
+		x.p = y
+
+	def insert(self, x):
+		super().insert(x)
+		x.color = RED
+		self.insert_fixup(x)
+
+	def insert_fixup(self, x):
+		# restore the red-black property violated by the red node x
+		while x.p.color == RED:
+			if x.p is x.p.p.left:
+				uncle = x.p.p.right
+				if uncle.color == RED:
+					x.p.color = BLACK
+					uncle.color = BLACK
+					x.p.p.color = RED
+					x = x.p.p
+				else:
+					if x is x.p.right:
+						x = x.p
+						self.left_rotate(x)
+					x.p.color = BLACK
+					x.p.p.color = RED
+					self.right_rotate(x.p.p)
+			else:
+				uncle = x.p.p.left
+				if uncle.color == RED:
+					x.p.color = BLACK
+					uncle.color = BLACK
+					x.p.p.color = RED
+					x = x.p.p
+				else:
+					if x is x.p.left:
+						x = x.p
+						self.right_rotate(x)
+					x.p.color = BLACK
+					x.p.p.color = RED
+					self.left_rotate(x.p.p)
+		self.root.color = BLACK
+
+	def delete(self, x):
+		# y is the node actually removed from (or moved within) the tree
+		# z is the node taking over y's original position, whose parent is tracked even if z is self.nil
+		y = x
+		color = y.color
+		if x.left is self.nil:
+			z = x.right
+			self.transplant(x, x.right)
+		elif x.right is self.nil:
+			z = x.left
+			self.transplant(x, x.left)
+		else:
+			y = self.minimum(x.right)
+			color = y.color
+			z = y.right
+			if y.p is x:
+				z.p = y
+			else:
+				self.transplant(y, y.right)
+				y.right = x.right
+				y.right.p = y
+			self.transplant(x, y)
+			y.left = x.left
+			y.left.p = y
+			y.color = x.color
+		if color == BLACK:
+			self.delete_fixup(z)
+
+	def delete_fixup(self, x):
+		# x carries an extra black ; push it up until it can be absorbed
+		while x is not self.root and x.color == BLACK:
+			if x is x.p.left:
+				sibling = x.p.right
+				if sibling.color == RED:
+					sibling.color = BLACK
+					x.p.color = RED
+					self.left_rotate(x.p)
+					sibling = x.p.right
+				if sibling.left.color == BLACK and sibling.right.color == BLACK:
+					sibling.color = RED
+					x = x.p
+				else:
+					if sibling.right.color == BLACK:
+						sibling.left.color = BLACK
+						sibling.color = RED
+						self.right_rotate(sibling)
+						sibling = x.p.right
+					sibling.color = x.p.color
+					x.p.color = BLACK
+					sibling.right.color = BLACK
+					self.left_rotate(x.p)
+					x = self.root
+			else:
+				sibling = x.p.left
+				if sibling.color == RED:
+					sibling.color = BLACK
+					x.p.color = RED
+					self.right_rotate(x.p)
+					sibling = x.p.left
+				if sibling.right.color == BLACK and sibling.left.color == BLACK:
+					sibling.color = RED
+					x = x.p
+				else:
+					if sibling.left.color == BLACK:
+						sibling.right.color = BLACK
+						sibling.color = RED
+						self.left_rotate(sibling)
+						sibling = x.p.left
+					sibling.color = x.p.color
+					x.p.color = BLACK
+					sibling.left.color = BLACK
+					self.right_rotate(x.p)
+					x = self.root
+		x.color = BLACK
+
+	def transplant(self, x, y):
+		# unlike BST.transplant, y.p is assigned even if y is self.nil, which delete_fixup relies on
+		super().transplant(x, y)
+		y.p = x.p
+
+
+# Order-statistic Tree Implementation
+class OSNode(RBNode):
+	__slots__ = ("size",)
+
+	def __init__(self, key=None, val=None):
+		super().__init__(key, val)
+		self.size = 0 # number of nodes in the subtree rooted here ; the sentinel keeps 0
+
+class OSTree(RBTree):
+	node_type = OSNode
+
+	def __len__(self):
+		return self.root.size
+
+	def left_rotate(self, x):
+		y = x.right
+		super().left_rotate(x)
+		y.size = x.size
+		x.size = x.left.size + x.right.size + 1
+
+	def right_rotate(self, x):
+		y = x.left
+		super().right_rotate(x)
+		y.size = x.size
+		x.size = x.left.size + x.right.size + 1
+
+	def insert(self, x):
+		x.size = 1
+		BST.insert(self, x)
+		curr = x.p
+		while curr is not self.nil:
+			curr.size += 1
+			curr = curr.p
+		x.color = RED
+		self.insert_fixup(x) # rotations keep the sizes
+
+	def delete(self, x):
+		# y is the node actually removed from its position, it's either x or the successor of x
+		y = x if x.left is self.nil or x.right is self.nil else self.minimum(x.right)
+		curr = y.p
+		while curr is not self.nil:
+			curr.size -= 1
+			curr = curr.p
+		if y is not x:
+			y.size = x.size # y takes over x's position
+		super().delete(x)
+
+	def annotate(self, x, depth, height):
+		super().annotate(x, depth, height)
+		x.size = x.left.size + x.right.size + 1
+
+	def select(self, k):
+		# return the k-th smallest node (0-based) ; O(log(n))
+		if not 0 <= k < self.root.size:
+			raise Exception("index out of range")
+		curr = self.root
+		while True:
+			r = curr.left.size
+			if k == r:
+				return curr
+			elif k < r:
+				curr = curr.left
+			else:
+				k -= r + 1
+				curr = curr.right
+
+	def rank(self, key, inclusive=False):
+		# return the number of nodes whose key < key (<= key if inclusive) ; O(log(n))
+		count = 0
+		curr = self.root
+		while curr is not self.nil:
+			if curr.key < key or (inclusive and curr.key == key):
+				count += curr.left.size + 1
+				curr = curr.right
+			else:
+				curr = curr.left
+		return count
+
+	def count_range(self, lo, hi):
+		# return the number of nodes with lo <= key <= hi ; O(log(n))
+		if hi < lo:
+			return 0
+		return self.rank(hi, inclusive=True) - self.rank(lo)
+
+
+# Struct-of-arrays Implementation
+# Same unbalanced BST as above, but node x is an integer handle into parallel columns instead of an object
+# key, left, right, p are typed arrays (8 bytes per entry), val is a list of references
+# handle 0 is the sentinel ; freed handles are chained through the right column and reused
+from array import array
+
+class ArrayBST:
+	def __init__(self, typecode="q"):
+		# typecode of the key column : "q" for int64 keys, "d" for float keys
+		self.key = array(typecode, [0])
+		self.val = [None]
+		self.p = array("q", [0])
+		self.left = array("q", [0])
+		self.right = array("q", [0])
+		self.root = 0
+		self.free = 0 # head of the free list
+		self.size = 0
+
+	def __len__(self):
+		return self.size
+
+	def insert(self, key, val=None):
+		# return the handle of the inserted node
+		x = self.free
+		if x:
+			self.free = self.right[x]
+			self.key[x] = key
+			self.val[x] = val
 		else:
-			self.inorder(x.left)
-			print(x)
-			self.inorder(x.right)
-
-	def preorder(self, x):
-		# Pre-order traversal among subtree rooted at x
-		if x is self.nil:
-			return
+			x = len(self.key)
+			self.key.append(key)
+			self.val.append(val)
+			self.p.append(0)
+			self.left.append(0)
+			self.right.append(0)
+		keys, left, right = self.key, self.left, self.right
+		left[x] = right[x] = 0
+		prev = 0
+		curr = self.root
+		while curr:
+			prev = curr
+			curr = left[curr] if key < keys[curr] else right[curr]
+		self.p[x] = prev
+		if not prev:
+			self.root = x
+		elif key < keys[prev]:
+			left[prev] = x
 		else:
-			print(x)
-			self.preorder(x.left)
-			self.preorder(x.right)
-
-	def postorder(self, x):
-		# Post-order traversal among subtree rooted at x
-		if x is self.nil:
-			return
+			right[prev] = x
+		self.size += 1
+		return x
+
+	def delete(self, x):
+		left, right, p = self.left, self.right, self.p
+		if not left[x]:
+			self.transplant(x, right[x])
+		elif not right[x]:
+			self.transplant(x, left[x])
 		else:
-			self.postorder(x.left)
-			self.postorder(x.right)
-			print(x)
+			nex = self.minimum(right[x])
+			if nex != right[x]:
+				self.transplant(nex, right[nex])
+				right[nex] = right[x]
+				p[right[nex]] = nex
+			self.transplant(x, nex)
+			left[nex] = left[x]
+			p[left[nex]] = nex
+		# release the handle
+		self.val[x] = None
+		right[x] = self.free
+		self.free = x
+		self.size -= 1
+
+	def transplant(self, x, y):
+		p = self.p
+		if x == self.root:
+			self.root = y
+		elif x == self.left[p[x]]:
+			self.left[p[x]] = y
+		else:
+			self.right[p[x]] = y
+		if y:
+			p[y] = p[x]
+
+	def search(self, key):
+		keys, left, right = self.key, self.left, self.right
+		curr = self.root
+		while curr:
+			if key == keys[curr]:
+				return curr
+			curr = left[curr] if key < keys[curr] else right[curr]
+		raise Exception("key not found")
+
+	def minimum(self, x):
+		left = self.left
+		while left[x]:
+			x = left[x]
+		return x
+
+	def maximum(self, x):
+		right = self.right
+		while right[x]:
+			x = right[x]
+		return x
+
+	def successor(self, x):
+		if self.right[x]:
+			return self.minimum(self.right[x])
+		p = self.p
+		while x != self.root:
+			if self.left[p[x]] == x:
+				return p[x]
+			x = p[x]
+		raise Exception("no successor")
+
+	def predecessor(self, x):
+		if self.left[x]:
+			return self.maximum(self.left[x])
+		p = self.p
+		while x != self.root:
+			if self.right[p[x]] == x:
+				return p[x]
+			x = p[x]
+		raise Exception("no predecessor")
+
+	def inorder(self, x=None):
+		# yield handles of the subtree rooted at x (default : root) in order
+		left, right = self.left, self.right
+		stack = []
+		curr = self.root if x is None else x
+		while stack or curr:
+			if curr:
+				stack.append(curr)
+				curr = left[curr]
+			else:
+				curr = stack.pop()
+				yield curr
+				curr = right[curr]
+
+	def __iter__(self):
+		return self.inorder()
+
+
+# Benchmark
+import random
+import time
+import tracemalloc
+
+def benchmark(n=2000):
+	# sorted keys degenerate BST into a chain of height n, while RBTree keeps h = O(log(n))
+	for order, keys in (("sorted", list(range(n))), ("random", random.sample(range(n), n))):
+		for tree, node in ((BST(), Node), (RBTree(), RBNode)):
+			start = time.perf_counter()
+			for key in keys:
+				tree.insert(node(key))
+			insert = time.perf_counter() - start
+			start = time.perf_counter()
+			for key in keys:
+				tree.search(key)
+			search = time.perf_counter() - start
+			print("%s %-6s insert : %10.0f ops/s, search : %10.0f ops/s" % (order, type(tree).__name__, n / insert, n / search))
+		for tree in (BST(), RBTree()):
+			start = time.perf_counter()
+			tree.build((key, None) for key in keys)
+			build = time.perf_counter() - start
+			print("%s %-6s build  : %10.0f ops/s" % (order, type(tree).__name__, n / build))
+
+def memory_benchmark(n=100000):
+	# bytes per element of a BST holding n random int keys
+	class DictNode: # the former Node layout, with a per-instance __dict__
+		def __init__(self, key=None, val=None):
+			self.key = key
+			self.val = val
+			self.p = self
+			self.left = self
+			self.right = self
+
+	keys = random.sample(range(1 << 40), n) # keys beyond the small int cache
+	def build_bst(node):
+		def build():
+			tree = BST()
+			for key in keys:
+				tree.insert(node(key))
+			return tree
+		return build
+	def build_array():
+		tree = ArrayBST()
+		for key in keys:
+			tree.insert(key)
+		return tree
+
+	for name, build in (("dict Node", build_bst(DictNode)), ("slots Node", build_bst(Node)), ("ArrayBST", build_array)):
+		tracemalloc.start()
+		tree = build()
+		current, peak = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+		del tree
+		print("%-10s : %6.1f bytes/element (peak %6.1f)" % (name, current / n, peak / n))
+
+if __name__ == "__main__":
+	benchmark()
+	memory_benchmark()
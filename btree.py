@@ -0,0 +1,338 @@
+###### B+ Tree ######
+"""
+- B+ tree property
+1. All (key, val) pairs are stored in the leaves ; internal nodes only store separator keys to guide the search.
+2. All leaves lie at the same depth, and are linked in key order (leaf.next, leaf.prev) for sequential range scans.
+3. With fan-out B (order), every node except the root holds between ceil(B/2) and B entries
+   (keys for a leaf, children for an internal node), so h = O(log_B(n)).
+4. For an internal node x, x.keys[i] separates x.children[i] (keys < x.keys[i]) and x.children[i+1] (keys >= x.keys[i]).
+5. Keys are unique ; inserting an existing key overwrites its val.
+6. A node keeps its entries in contiguous lists, so one node hop replaces about log2(B) pointer hops of a binary tree.
+
+- Basic Operation:
+# B is the order (fan-out), h = O(log_B(n)) ; binary search inside a node costs O(log(B))
+1. Insert(S, k, v) : O(log(n)) comparisons, O(h) node hops, O(B) for the list insertion
+2. Delete(S, k) : O(log(n)) comparisons, O(h) node hops, O(B) for the list deletion
+3. Search(S, k) : O(log(n)) comparisons, O(h) node hops
+4. Maximum(S) : O(h)
+5. Minimum(S) : O(1)
+6. Successor(S, k) : O(log(n)), k doesn't need to be in S
+7. Predecessor(S, k) : O(log(n)), k doesn't need to be in S
+
+- Advanced Operation:
+1. Range(S, lo, hi) : O(log(n) + m) for m pairs with lo <= key <= hi, following the leaf links
+   Reverse(S, hi) streams pairs with key <= hi in descending order the same way
+2. Build(S, items) : bulk load, O(n) if items are sorted by key ; otherwise O(nlog(n))
+"""
+from bisect import bisect_left, bisect_right
+
+class Node:
+	__slots__ = ("keys", "vals", "children", "prev", "next")
+
+	def __init__(self, keys=None, vals=None, children=None):
+		self.keys = keys if keys is not None else []
+		self.vals = vals # leaf only
+		self.children = children # internal only ; None for a leaf
+		self.prev = None # leaf only
+		self.next = None # leaf only
+
+class BPlusTree:
+	def __init__(self, order=64):
+		if order < 3:
+			raise ValueError("order must be at least 3")
+		self.order = order
+		self.min = (order + 1) // 2 # minimum entries of a non-root node
+		self.root = Node(vals=[])
+		self.head = self.root # leftmost leaf
+		self.size = 0
+
+	def __len__(self):
+		return self.size
+
+	def __iter__(self):
+		return self.range_from(self.head, 0)
+
+	@classmethod
+	def from_items(cls, items, order=64):
+		tree = cls(order)
+		tree.build(items)
+		return tree
+
+	def build(self, items):
+		# bulk load (key, val) pairs, replacing the current content ; for duplicated keys the last val wins
+		# O(n) if items are sorted by key ; otherwise they are sorted first, O(nlog(n))
+		items = list(items)
+		if any(items[i + 1][0] < items[i][0] for i in range(len(items) - 1)):
+			items.sort(key=lambda item: item[0]) # stable, so the last duplicate stays last
+		keys = []
+		vals = []
+		for key, val in items:
+			if keys and keys[-1] == key:
+				vals[-1] = val
+			else:
+				keys.append(key)
+				vals.append(val)
+		self.size = len(keys)
+		# leaves : split evenly so that none of them underflows
+		level = []
+		for lo, hi in self.chunks(len(keys)):
+			leaf = Node(keys[lo:hi], vals[lo:hi])
+			if level:
+				leaf.prev = level[-1]
+				level[-1].next = leaf
+			level.append(leaf)
+		if not level:
+			level.append(Node(vals=[]))
+		self.head = level[0]
+		# internal levels : separator of a subtree is its smallest key
+		lows = [leaf.keys[0] if leaf.keys else None for leaf in level]
+		while len(level) > 1:
+			parents = []
+			parent_lows = []
+			for lo, hi in self.chunks(len(level)):
+				parents.append(Node(lows[lo + 1:hi], children=level[lo:hi]))
+				parent_lows.append(lows[lo])
+			level = parents
+			lows = parent_lows
+		self.root = level[0]
+
+	def chunks(self, n):
+		# split range(n) into ceil(n / order) contiguous chunks whose sizes differ by at most 1
+		count = -(-n // self.order)
+		for i in range(count):
+			yield i * n // count, (i + 1) * n // count
+
+	def find_leaf(self, key, path=None):
+		# descend to the leaf where key is or would be ; record (node, child index) along the path if asked
+		node = self.root
+		while node.children is not None:
+			i = bisect_right(node.keys, key)
+			if path is not None:
+				path.append((node, i))
+			node = node.children[i]
+		return node
+
+	def search(self, key):
+		leaf = self.find_leaf(key)
+		i = bisect_left(leaf.keys, key)
+		if i < len(leaf.keys) and leaf.keys[i] == key:
+			return leaf.vals[i]
+		raise Exception("key not found")
+
+	def get(self, key, default=None):
+		# like search, but return default instead of raising when key is absent
+		leaf = self.find_leaf(key)
+		i = bisect_left(leaf.keys, key)
+		if i < len(leaf.keys) and leaf.keys[i] == key:
+			return leaf.vals[i]
+		return default
+
+	def insert(self, key, val=None):
+		path = []
+		node = self.find_leaf(key, path)
+		i = bisect_left(node.keys, key)
+		if i < len(node.keys) and node.keys[i] == key:
+			node.vals[i] = val
+			return
+		node.keys.insert(i, key)
+		node.vals.insert(i, val)
+		self.size += 1
+		if len(node.keys) <= self.order:
+			return
+		# split the overflowing leaf, the right half goes to a new leaf
+		mid = len(node.keys) // 2
+		right = Node(node.keys[mid:], node.vals[mid:])
+		del node.keys[mid:]
+		del node.vals[mid:]
+		right.prev = node
+		right.next = node.next
+		if node.next:
+			node.next.prev = right
+		node.next = right
+		sep = right.keys[0]
+		# push the separator up, splitting overflowing internal nodes
+		while path:
+			parent, i = path.pop()
+			parent.keys.insert(i, sep)
+			parent.children.insert(i + 1, right)
+			if len(parent.children) <= self.order:
+				return
+			mid = len(parent.keys) // 2
+			sep = parent.keys[mid]
+			right = Node(parent.keys[mid + 1:], children=parent.children[mid + 1:])
+			del parent.keys[mid:]
+			del parent.children[mid + 1:]
+		self.root = Node([sep], children=[self.root, right])
+
+	def delete(self, key):
+		path = []
+		node = self.find_leaf(key, path)
+		i = bisect_left(node.keys, key)
+		if i == len(node.keys) or node.keys[i] != key:
+			raise Exception("key not found")
+		del node.keys[i]
+		del node.vals[i]
+		self.size -= 1
+		# stale separators remain valid bounds, so only underflows need fixing
+		while path:
+			leaf = node.children is None
+			if (len(node.keys) if leaf else len(node.children)) >= self.min:
+				break
+			parent, i = path.pop()
+			left = parent.children[i - 1] if i > 0 else None
+			right = parent.children[i + 1] if i + 1 < len(parent.children) else None
+			if left and (len(left.keys) if leaf else len(left.children)) > self.min:
+				# borrow the last entry of the left sibling
+				if leaf:
+					node.keys.insert(0, left.keys.pop())
+					node.vals.insert(0, left.vals.pop())
+					parent.keys[i - 1] = node.keys[0]
+				else:
+					node.keys.insert(0, parent.keys[i - 1])
+					node.children.insert(0, left.children.pop())
+					parent.keys[i - 1] = left.keys.pop()
+				break
+			elif right and (len(right.keys) if leaf else len(right.children)) > self.min:
+				# borrow the first entry of the right sibling
+				if leaf:
+					node.keys.append(right.keys.pop(0))
+					node.vals.append(right.vals.pop(0))
+					parent.keys[i] = right.keys[0]
+				else:
+					node.keys.append(parent.keys[i])
+					node.children.append(right.children.pop(0))
+					parent.keys[i] = right.keys.pop(0)
+				break
+			# merge with a sibling, always into the left one so that self.head survives
+			if left:
+				i -= 1
+			else:
+				left, node = node, right
+			if leaf:
+				left.keys.extend(node.keys)
+				left.vals.extend(node.vals)
+				left.next = node.next
+				if node.next:
+					node.next.prev = left
+			else:
+				left.keys.append(parent.keys[i])
+				left.keys.extend(node.keys)
+				left.children.extend(node.children)
+			del parent.keys[i]
+			del parent.children[i + 1]
+			node = parent
+		if self.root.children is not None and len(self.root.children) == 1:
+			self.root = self.root.children[0]
+
+	def minimum(self):
+		# return (key, val) with the smallest key
+		if not self.size:
+			raise Exception("empty tree")
+		return self.head.keys[0], self.head.vals[0]
+
+	def maximum(self):
+		# return (key, val) with the largest key
+		if not self.size:
+			raise Exception("empty tree")
+		node = self.root
+		while node.children is not None:
+			node = node.children[-1]
+		return node.keys[-1], node.vals[-1]
+
+	def successor(self, key):
+		# return (key, val) whose key is next larger than key
+		leaf = self.find_leaf(key)
+		i = bisect_right(leaf.keys, key)
+		if i == len(leaf.keys):
+			leaf = leaf.next
+			i = 0
+		if leaf is None:
+			raise Exception("no successor")
+		return leaf.keys[i], leaf.vals[i]
+
+	def predecessor(self, key):
+		# return (key, val) whose key is next smaller than key
+		leaf = self.find_leaf(key)
+		i = bisect_left(leaf.keys, key)
+		if i == 0:
+			leaf = leaf.prev
+			if leaf is None:
+				raise Exception("no predecessor")
+			i = len(leaf.keys)
+		return leaf.keys[i - 1], leaf.vals[i - 1]
+
+	def range(self, lo, hi):
+		# yield (key, val) with lo <= key <= hi in order
+		leaf = self.find_leaf(lo)
+		for key, val in self.range_from(leaf, bisect_left(leaf.keys, lo)):
+			if hi < key:
+				return
+			yield key, val
+
+	def reverse(self, hi):
+		# yield (key, val) with key <= hi in descending order, following the leaf links backwards
+		leaf = self.find_leaf(hi)
+		i = bisect_right(leaf.keys, hi)
+		while leaf:
+			keys = leaf.keys
+			vals = leaf.vals
+			while i > 0:
+				i -= 1
+				yield keys[i], vals[i]
+			leaf = leaf.prev
+			if leaf:
+				i = len(leaf.keys)
+
+	def range_from(self, leaf, i):
+		# yield (key, val) in order, starting from leaf.keys[i] and following the leaf links
+		while leaf:
+			keys = leaf.keys
+			vals = leaf.vals
+			while i < len(keys):
+				yield keys[i], vals[i]
+				i += 1
+			leaf = leaf.next
+			i = 0
+
+
+# Benchmark
+import random
+import time
+
+def benchmark(n=200000, order=64):
+	# compare with the red-black tree, which does one node hop per comparison
+	from bst import RBTree, RBNode
+	keys = random.sample(range(n * 10), n)
+	tree = RBTree()
+	start = time.perf_counter()
+	for key in keys:
+		tree.insert(RBNode(key))
+	insert = time.perf_counter() - start
+	start = time.perf_counter()
+	for key in keys:
+		tree.search(key)
+	search = time.perf_counter() - start
+	start = time.perf_counter()
+	count = sum(1 for _ in tree.range(0, n * 5))
+	scan = time.perf_counter() - start
+	print("RBTree     insert : %9.0f ops/s, search : %9.0f ops/s, range scan : %10.0f keys/s" % (n / insert, n / search, count / scan))
+
+	tree = BPlusTree(order)
+	start = time.perf_counter()
+	for key in keys:
+		tree.insert(key)
+	insert = time.perf_counter() - start
+	start = time.perf_counter()
+	for key in keys:
+		tree.search(key)
+	search = time.perf_counter() - start
+	start = time.perf_counter()
+	count = sum(1 for _ in tree.range(0, n * 5))
+	scan = time.perf_counter() - start
+	print("BPlusTree  insert : %9.0f ops/s, search : %9.0f ops/s, range scan : %10.0f keys/s" % (n / insert, n / search, count / scan))
+	start = time.perf_counter()
+	BPlusTree.from_items(sorted((key, None) for key in keys), order)
+	print("BPlusTree  build  : %9.0f ops/s" % (n / (time.perf_counter() - start)))
+
+if __name__ == "__main__":
+	benchmark()
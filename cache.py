@@ -0,0 +1,262 @@
+###### Cache ######
+"""
+- Bounded key-value caches built on the indexed array DoublyLinkedList
+1. LRUCache : one list ordered by recency ; a hit moves the entry to the head, the tail is evicted
+2. LFUCache : one list per access frequency (freq -> DoublyLinkedList) ordered by recency inside the bucket ;
+   a hit moves the entry to the next bucket, the tail of the least frequent bucket is evicted (ties : least recent)
+3. ttl (optional, in seconds) : an entry expires ttl seconds after it was put ;
+   expired entries are dropped lazily, when they are looked up or reach the eviction end
+4. hits / misses / evictions / expirations counters, see stats()
+
+- Basic Operation:
+1. Get(C, k) : O(1)
+2. Put(C, k, v) : O(1)
+3. Delete(C, k) : O(1) ; LFUCache rescans the bucket freqs when the least frequent bucket empties
+4. Memoize(C, f) : wrap f so that f(*args) is computed once per args while cached
+"""
+import time
+from abc import ABC, abstractmethod
+from functools import wraps
+
+from doublylinkedlist import DoublyLinkedList, Node
+
+MISSING = object()
+
+class Entry(Node):
+	__slots__ = ("expires", "freq")
+
+	def __init__(self, key, val, expires=None):
+		super().__init__(key, val)
+		self.expires = expires # deadline on the clock, None if the entry never expires
+		self.freq = 1
+
+class Cache(ABC):
+	# a cache engine implements the storage hooks below ; get/put/delete/memoize and the counters are shared
+	def __init__(self, capacity, ttl=None, clock=time.monotonic):
+		if capacity < 1:
+			raise ValueError("capacity must be positive")
+		self.capacity = capacity
+		self.ttl = ttl
+		self.clock = clock
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.expirations = 0
+
+	@abstractmethod
+	def __len__(self):
+		# number of entries held, expired ones included until they are dropped
+		pass
+
+	@abstractmethod
+	def lookup(self, key):
+		# return the live entry of key, or None ; an expired entry is dropped here
+		pass
+
+	@abstractmethod
+	def touch(self, entry):
+		# record an access to entry
+		pass
+
+	@abstractmethod
+	def store(self, entry):
+		# add a new entry ; the caller has made room for it
+		pass
+
+	@abstractmethod
+	def remove(self, entry):
+		# drop entry
+		pass
+
+	@abstractmethod
+	def evict(self):
+		# drop the entry chosen by the policy, counting it as an eviction or an expiration
+		pass
+
+	def __contains__(self, key):
+		return self.lookup(key) is not None
+
+	def expired(self, entry):
+		return entry.expires is not None and entry.expires <= self.clock()
+
+	def get(self, key, default=None):
+		entry = self.lookup(key)
+		if entry is None:
+			self.misses += 1
+			return default
+		self.hits += 1
+		self.touch(entry)
+		return entry.val
+
+	def put(self, key, val):
+		expires = None if self.ttl is None else self.clock() + self.ttl
+		entry = self.lookup(key)
+		if entry is not None:
+			entry.val = val
+			entry.expires = expires
+			self.touch(entry)
+			return
+		if len(self) >= self.capacity:
+			self.evict()
+		self.store(Entry(key, val, expires))
+
+	def delete(self, key):
+		entry = self.lookup(key)
+		if entry is None:
+			raise Exception("key not found")
+		self.remove(entry)
+
+	def stats(self):
+		total = self.hits + self.misses
+		return {
+			"hits": self.hits,
+			"misses": self.misses,
+			"evictions": self.evictions,
+			"expirations": self.expirations,
+			"size": len(self),
+			"hit_rate": self.hits / total if total else 0.0,
+		}
+
+	def memoize(self, f):
+		# cache f(*args) keyed by args, which must be hashable
+		@wraps(f)
+		def wrapper(*args):
+			val = self.get(args, MISSING)
+			if val is MISSING:
+				val = f(*args)
+				self.put(args, val)
+			return val
+		wrapper.cache = self
+		return wrapper
+
+class LRUCache(Cache):
+	def __init__(self, capacity, ttl=None, clock=time.monotonic):
+		super().__init__(capacity, ttl, clock)
+		self.list = DoublyLinkedList(capacity, indexed=True)
+
+	def __len__(self):
+		return len(self.list)
+
+	def lookup(self, key):
+		index = self.list.index.get(key)
+		if index is None:
+			return None
+		entry = self.list.pool.items[index]
+		if self.expired(entry):
+			self.list.delete(index)
+			self.expirations += 1
+			return None
+		return entry
+
+	def touch(self, entry):
+		# move to the head ; the freed slot is reused at once, so no allocation happens
+		lst = self.list
+		lst.delete(lst.index[entry.key])
+		lst.insert(entry)
+
+	def store(self, entry):
+		self.list.insert(entry)
+
+	def remove(self, entry):
+		self.list.delete_key(entry.key)
+
+	def evict(self):
+		lst = self.list
+		entry = lst.pool.items[lst.tail]
+		lst.delete(lst.tail)
+		if self.expired(entry):
+			self.expirations += 1
+		else:
+			self.evictions += 1
+
+class LFUCache(Cache):
+	def __init__(self, capacity, ttl=None, clock=time.monotonic):
+		super().__init__(capacity, ttl, clock)
+		self.buckets = {} # freq -> DoublyLinkedList of the entries accessed freq times, most recent first
+		self.freq = {} # key -> freq
+		self.min = 0 # smallest non-empty freq
+
+	def __len__(self):
+		return len(self.freq)
+
+	def lookup(self, key):
+		freq = self.freq.get(key)
+		if freq is None:
+			return None
+		entry = self.buckets[freq].search(key)
+		if self.expired(entry):
+			self.remove(entry)
+			self.expirations += 1
+			return None
+		return entry
+
+	def unlink(self, entry):
+		bucket = self.buckets[entry.freq]
+		bucket.delete_key(entry.key)
+		if not len(bucket):
+			del self.buckets[entry.freq] # drop empty buckets, so memory follows the live entries
+			if self.min == entry.freq:
+				self.min += 1
+
+	def link(self, entry):
+		bucket = self.buckets.get(entry.freq)
+		if bucket is None:
+			bucket = self.buckets[entry.freq] = DoublyLinkedList(indexed=True)
+		bucket.insert(entry)
+		self.freq[entry.key] = entry.freq
+
+	def touch(self, entry):
+		self.unlink(entry)
+		entry.freq += 1
+		self.link(entry)
+
+	def store(self, entry):
+		self.link(entry)
+		self.min = 1
+
+	def remove(self, entry):
+		self.unlink(entry)
+		del self.freq[entry.key]
+		if not self.freq:
+			self.min = 0
+		elif self.min not in self.buckets:
+			self.min = min(self.buckets) # only after removing the last entry of the least frequent bucket
+
+	def evict(self):
+		bucket = self.buckets[self.min]
+		entry = bucket.pool.items[bucket.tail]
+		self.remove(entry)
+		if self.expired(entry):
+			self.expirations += 1
+		else:
+			self.evictions += 1
+
+
+# Benchmark
+import random
+
+def benchmark(n=100000, capacity=1000, keys=5000):
+	# skewed workload : a few keys are hot, so frequency beats recency
+	workload = [int(random.paretovariate(0.3)) % keys for _ in range(n)]
+	for cls in (LRUCache, LFUCache):
+		cache = cls(capacity)
+		start = time.perf_counter()
+		for key in workload:
+			if cache.get(key) is None:
+				cache.put(key, key)
+		elapsed = time.perf_counter() - start
+		print("%s : %9.0f ops/s, hit rate %.3f" % (cls.__name__, n / elapsed, cache.stats()["hit_rate"]))
+
+if __name__ == "__main__":
+	cache = LRUCache(2)
+	cache.put("a", 1)
+	cache.put("b", 2)
+	cache.get("a") # "a" becomes the most recent
+	cache.put("c", 3) # evicts "b"
+	print("b" in cache, cache.stats())
+
+	@LRUCache(128).memoize
+	def fib(n):
+		return n if n < 2 else fib(n - 1) + fib(n - 2)
+	print(fib(80), fib.cache.stats())
+	benchmark()
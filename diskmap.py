@@ -0,0 +1,322 @@
+###### Disk Map ######
+"""
+- Memory-mapped ordered map of int64 keys to int64 vals, persisted in a single file
+1. The file is divided into fixed-size pages (4096 bytes)
+-- page 0 : header (magic, page size, number of base records, number of committed log records)
+-- base pages : (key, val) records sorted by key, written once by create() or compact()
+-- log pages : (key, val, op) records appended by insert/delete, following the base pages
+2. The file is mmap'd read-only, so opening it costs O(1) for the base, which is read zero-copy
+   through memoryview and shared through the OS page cache by every process opening the same file.
+   Only the committed log records are replayed into an in-memory B+ tree overlay at startup.
+3. Crash-safe commit : pending log records are written and fsync'd first, then the committed count in the header
+   is updated and fsync'd. Records past the committed count (a crash in between) are ignored and overwritten.
+4. compact() merges the log into new base pages, writing a new file and atomically replacing the old one.
+   Readers which opened the old file keep reading their own (still valid) mapping.
+5. Single writer ; readers see the state committed when they opened the file.
+
+- Basic Operation:
+# n : number of base records, m : number of log records
+1. Insert(S, k, v) : O(log(m)) until commit
+2. Delete(S, k) : O(log(n) + log(m)) until commit
+3. Search(S, k) : O(log(n) + log(m))
+4. Maximum(S) : O(log(m)) + number of deleted keys skipped
+5. Minimum(S) : O(log(m)) + number of deleted keys skipped
+6. Successor(S, k) : O(log(n) + log(m)) + number of deleted keys skipped
+7. Predecessor(S, k) : O(log(n) + log(m)) + number of deleted keys skipped
+
+- Advanced Operation:
+1. Range(S, lo, hi) : stream the live pairs with lo <= key <= hi by merging base pages with the overlay
+2. Commit(S) : persist the pending inserts and deletes, O(pending)
+3. Compact(S) : rewrite the file with the log merged into the base, O(n + m)
+"""
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+
+from btree import BPlusTree
+
+PAGE = 4096
+MAGIC = b"DSAMAP01"
+HEADER = struct.Struct("<8sQQQ") # magic, page size, base count, committed log count
+COMMITTED = 24 # offset of the committed log count in the header
+BASE = 16 # bytes per base record : key, val
+LOG = 24 # bytes per log record : key, val, op
+INSERT = 1
+DELETE = 0
+TOMBSTONE = object() # overlay marker of a deleted base key
+MAXKEY = (1 << 63) - 1
+MINKEY = -(1 << 63)
+
+def pages(nbytes):
+	# number of pages needed to hold nbytes
+	return -(-nbytes // PAGE)
+
+class DiskMap:
+	def __init__(self, path, writable=False):
+		self.path = path
+		self.writable = writable
+		self.file = None
+		self.mm = None
+		self.open()
+
+	@classmethod
+	def create(cls, path, items=()):
+		# write a new file holding (key, val) pairs ; for duplicated keys the last val wins
+		# O(n) if items are sorted by key ; otherwise they are sorted first, O(nlog(n))
+		items = list(items)
+		if any(items[i + 1][0] < items[i][0] for i in range(len(items) - 1)):
+			items.sort(key=lambda item: item[0])
+		records = array("q")
+		for key, val in items:
+			if records and records[-2] == key:
+				records[-1] = val
+			else:
+				records.append(key)
+				records.append(val)
+		cls.write(path, records)
+		return cls(path, writable=True)
+
+	@staticmethod
+	def write(path, records):
+		# write header and base pages to a temporary file, then atomically replace path with it
+		count = len(records) // 2
+		temp = path + ".tmp"
+		with open(temp, "wb") as f:
+			f.write(HEADER.pack(MAGIC, PAGE, count, 0).ljust(PAGE, b"\0"))
+			f.write(records.tobytes())
+			f.write(b"\0" * (pages(count * BASE) * PAGE - count * BASE))
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(temp, path)
+		dirfd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+		try:
+			os.fsync(dirfd)
+		finally:
+			os.close(dirfd)
+
+	def open(self):
+		self.file = open(self.path, "r+b" if self.writable else "rb")
+		self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+		magic, page, count, committed = HEADER.unpack_from(self.mm, 0)
+		if magic != MAGIC or page != PAGE:
+			self.close()
+			raise Exception("not a disk map file")
+		self.count = count
+		self.committed = committed
+		self.logstart = PAGE + pages(count * BASE) * PAGE
+		# zero-copy views of the base pages : keys at even slots, vals at odd slots
+		self.base = memoryview(self.mm)[PAGE:PAGE + count * BASE].cast("q")
+		self.keys = self.base[0::2]
+		self.vals = self.base[1::2]
+		# replay the committed log into the overlay
+		self.log = BPlusTree()
+		self.size = count
+		self.pending = array("q")
+		records = array("q", self.mm[self.logstart:self.logstart + committed * LOG])
+		for i in range(0, len(records), 3):
+			self.apply(records[i], records[i + 1], records[i + 2])
+
+	def close(self):
+		# views must be released before the mapping can be closed ; pending records are discarded
+		for view in ("keys", "vals", "base"):
+			if getattr(self, view, None) is not None:
+				getattr(self, view).release()
+				setattr(self, view, None)
+		if self.mm is not None:
+			self.mm.close()
+			self.mm = None
+		if self.file is not None:
+			self.file.close()
+			self.file = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def __len__(self):
+		return self.size
+
+	def __iter__(self):
+		return self.range(MINKEY, MAXKEY)
+
+	def base_search(self, key):
+		# return the index of key among the base records, or -1
+		i = bisect_left(self.keys, key)
+		if i < self.count and self.keys[i] == key:
+			return i
+		return -1
+
+	def get(self, key, default=None):
+		val = self.log.get(key)
+		if val is None:
+			i = self.base_search(key)
+			return self.vals[i] if i >= 0 else default
+		return default if val is TOMBSTONE else val
+
+	def search(self, key):
+		val = self.get(key, TOMBSTONE)
+		if val is TOMBSTONE:
+			raise Exception("key not found")
+		return val
+
+	def apply(self, key, val, op):
+		# apply a log record to the overlay ; the overlay stores val, or TOMBSTONE for a deleted base key
+		exists = self.get(key, TOMBSTONE) is not TOMBSTONE
+		if op == INSERT:
+			if not exists:
+				self.size += 1
+			self.log.insert(key, val)
+		else:
+			if exists:
+				self.size -= 1
+			if self.base_search(key) >= 0:
+				self.log.insert(key, TOMBSTONE)
+			elif self.log.get(key) is not None:
+				self.log.delete(key)
+
+	def insert(self, key, val):
+		if not self.writable:
+			raise Exception("read-only disk map")
+		record = array("q", (key, val, INSERT)) # raises OverflowError before any state changes
+		self.apply(key, val, INSERT)
+		self.pending.extend(record)
+
+	def delete(self, key):
+		if not self.writable:
+			raise Exception("read-only disk map")
+		if self.get(key, TOMBSTONE) is TOMBSTONE:
+			raise Exception("key not found")
+		record = array("q", (key, 0, DELETE))
+		self.apply(key, 0, DELETE)
+		self.pending.extend(record)
+
+	def commit(self):
+		# append the pending records, then publish them by updating the committed count in the header
+		if not self.pending:
+			return
+		self.file.seek(self.logstart + self.committed * LOG)
+		self.file.write(self.pending.tobytes())
+		self.file.flush()
+		os.fsync(self.file.fileno())
+		self.committed += len(self.pending) // 3
+		self.file.seek(COMMITTED)
+		self.file.write(struct.pack("<Q", self.committed))
+		self.file.flush()
+		os.fsync(self.file.fileno())
+		self.pending = array("q")
+
+	def compact(self):
+		# merge the committed and pending log into new base pages
+		if not self.writable:
+			raise Exception("read-only disk map")
+		records = array("q")
+		for key, val in self:
+			records.append(key)
+			records.append(val)
+		self.close()
+		self.write(self.path, records)
+		self.open()
+
+	def range(self, lo, hi):
+		# yield live (key, val) with lo <= key <= hi in order, merging the base pages with the overlay
+		keys, vals = self.keys, self.vals
+		i = bisect_left(keys, lo)
+		n = bisect_right(keys, hi)
+		overlay = self.log.range(lo, hi)
+		nxt = next(overlay, None)
+		while i < n or nxt is not None:
+			if nxt is not None and (i == n or nxt[0] <= keys[i]):
+				key, val = nxt
+				if i < n and keys[i] == key:
+					i += 1 # the overlay overrides the base record
+				nxt = next(overlay, None)
+				if val is not TOMBSTONE:
+					yield key, val
+			else:
+				yield keys[i], vals[i]
+				i += 1
+
+	def reverse(self, hi):
+		# yield live (key, val) with key <= hi in descending order
+		keys, vals = self.keys, self.vals
+		i = bisect_right(keys, hi) - 1
+		overlay = self.log.reverse(hi)
+		nxt = next(overlay, None)
+		while i >= 0 or nxt is not None:
+			if nxt is not None and (i < 0 or nxt[0] >= keys[i]):
+				key, val = nxt
+				if i >= 0 and keys[i] == key:
+					i -= 1
+				nxt = next(overlay, None)
+				if val is not TOMBSTONE:
+					yield key, val
+			else:
+				yield keys[i], vals[i]
+				i -= 1
+
+	def minimum(self):
+		for item in self.range(MINKEY, MAXKEY):
+			return item
+		raise Exception("empty map")
+
+	def maximum(self):
+		for item in self.reverse(MAXKEY):
+			return item
+		raise Exception("empty map")
+
+	def successor(self, key):
+		if key < MAXKEY:
+			for item in self.range(key + 1, MAXKEY):
+				return item
+		raise Exception("no successor")
+
+	def predecessor(self, key):
+		if key > MINKEY:
+			for item in self.reverse(key - 1):
+				return item
+		raise Exception("no predecessor")
+
+
+# Benchmark
+import random
+import tempfile
+import time
+
+def benchmark(n=1000000):
+	# startup : open the file versus rebuilding an in-memory tree from the same data
+	items = [(key, key * 2) for key in sorted(random.sample(range(n * 10), n))]
+	probes = random.sample(items, 1000)
+	with tempfile.TemporaryDirectory() as directory:
+		path = os.path.join(directory, "map")
+		start = time.perf_counter()
+		DiskMap.create(path, items).close()
+		print("create  : %8.3f s" % (time.perf_counter() - start))
+
+		start = time.perf_counter()
+		disk = DiskMap(path)
+		opened = time.perf_counter() - start
+		start = time.perf_counter()
+		for key, val in probes:
+			disk.search(key)
+		search = time.perf_counter() - start
+		print("open    : %8.3f ms, search : %9.0f ops/s" % (opened * 1000, len(probes) / search))
+
+		start = time.perf_counter()
+		tree = BPlusTree.from_items(items)
+		print("rebuild : %8.3f ms (BPlusTree bulk load)" % ((time.perf_counter() - start) * 1000))
+
+		disk.close()
+		disk = DiskMap(path, writable=True)
+		start = time.perf_counter()
+		for key, val in probes:
+			disk.insert(key + 1, val)
+		disk.commit()
+		print("commit  : %8.3f ms for %d records" % ((time.perf_counter() - start) * 1000, len(probes)))
+		disk.close()
+
+if __name__ == "__main__":
+	benchmark()
@@ -12,10 +12,16 @@
 5. Minimum : NOT IMPLEMENTED
 6. Successor : NOT IMPLEMENTED
 7. Predecessor : NOT IMPLEMENTED
+- Array implementation : nodes live in slots of a pool allocator (pool.Pool) with typed next/prev columns,
+  deleted slots are reused and the capacity grows geometrically, so there is no hard cap
+- Indexed : a hash index key -> slot makes Search(S, k) and delete by key O(1) ; keys must be unique
 """
+from pool import Pool
 
 # Universal Implementation (Naïve)
 class Node:
+	__slots__ = ("key", "val", "prev", "next")
+
 	def __init__(self, key=None, val=None):
 		self.key = key
 		self.val = val # satelite data
@@ -53,46 +59,84 @@ class DoublyLinkedList:
 
 # Array Inplementation
 class Node:
+	__slots__ = ("key", "val")
+
 	def __init__(self, key=None, val=None):
 		self.key = key
 		self.val = val # satelite data
 
 class DoublyLinkedList:
-	def __init__(self, maxsize):
+	# slots come from a Pool : next/prev links in typed arrays, freed slots reused, capacity doubling on demand
+	# the sentinel slot 0 closes the circle : next[0] is the head and prev[0] the tail
+	# indexed : keep a hash index key -> slot, so search and delete by key are O(1) ; keys must be unique
+	def __init__(self, capacity=16, indexed=False):
 		self.nil = Node()
-		self.freestack = list(range(3, 3 * maxsize + 3, 3)) # first three spaces belong to sentinel node
-		self.record = [None] * (3 * maxsize + 3) # each node takes 3 space ;  total # = maxsize + 1 (sentinel node)
-		self.record[0] = self.nil
-		self.record[1] = 0 # default next attribute points to sentinel itself
-		self.record[2] = 0 # default prev attribute points to sentinel itself
+		self.pool = Pool(capacity, doubly=True)
+		self.pool.items[0] = self.nil # slot 0 belongs to sentinel node
 		self.head = 0
+		self.index = {} if indexed else None
+
+	def __len__(self):
+		return len(self.pool)
+
+	@property
+	def tail(self):
+		# slot index of the last node, 0 if empty
+		return self.pool.prev[0]
 
 	def insert(self, x):
-		try:
-			freeindex = self.freestack.pop()
-		except IndexError:
-			raise Exception("out of free space")
-		else:
-			self.record[freeindex] = x
-			self.record[freeindex + 1] = self.head
-			self.record[freeindex + 2] = 0 # prev attribute of the new node points back to the sentinel
-			self.head = freeindex
-			self.record[1] = freeindex
+		# return the slot index of x, which serves as the pointer to x for delete
+		if self.index is not None and x.key in self.index:
+			raise Exception("duplicate key")
+		index = self.pool.alloc(x)
+		nxt, prev = self.pool.next, self.pool.prev
+		nxt[index] = self.head
+		prev[index] = 0 # prev attribute of the new node points back to the sentinel
+		prev[self.head] = index # if the list was empty, the new node is also the tail
+		nxt[0] = index
+		self.head = index
+		if self.index is not None:
+			self.index[x.key] = index
+		return index
 
 	def delete(self, x_index):
 		# x_index is regarded as the pointer to x
-		nex = self.record[x_index + 1]
-		pre = self.record[x_index + 2]
-		self.record[pre + 1] = nex
-		self.record[nex + 2] = pre
+		nxt, prev = self.pool.next, self.pool.prev
+		if self.index is not None:
+			del self.index[self.pool.items[x_index].key]
+		nex = nxt[x_index]
+		pre = prev[x_index]
+		nxt[pre] = nex
+		prev[nex] = pre
 		if x_index == self.head:
 			self.head = nex
+		self.pool.release(x_index) # the slot goes back to the free list
 
-	def search(self, key):
-		index = self.head
-		while self.record[index].key != key:
-			if not index:
+	def locate(self, key):
+		# return the slot index of the node with key
+		if self.index is not None:
+			if key not in self.index:
 				raise Exception("key not found")
-			else:
-				index = self.record[index + 1]
-		return self.record[index]
+			return self.index[key]
+		items, nxt = self.pool.items, self.pool.next
+		index = self.head
+		while index:
+			if items[index].key == key:
+				return index
+			index = nxt[index]
+		raise Exception("key not found")
+
+	def delete_key(self, key):
+		self.delete(self.locate(key))
+
+	def search(self, key):
+		return self.pool.items[self.locate(key)]
+
+	def compact(self):
+		# renumber the slots densely ; return the mapping from old to new slot indices
+		mapping = self.pool.compact()
+		self.head = mapping[self.head]
+		if self.index is not None:
+			for key, index in self.index.items():
+				self.index[key] = mapping[index]
+		return mapping
@@ -0,0 +1,169 @@
+###### Fenwick Tree (Binary Indexed Tree) ######
+"""
+Support dynamic prefix sums with following methods
+1. build(array) : O(n)
+2. update(i, delta) : array[i] += delta, O(log(n))
+3. prefix(i) : sum of array[0..i] (inclusive), O(log(n))
+4. query(i, j) : sum of array[i..j] (inclusive), O(log(n))
+5. lower_bound(target) : smallest i such that prefix(i) >= target, O(log(n)) ; all values must be non-negative
+* fenwick tree : n + 1 slots in a typed array ('q' for int64, 'd' for float), 1-based
+-- tree[k] = sum of array[k - lowbit(k) .. k - 1], where lowbit(k) = k & -k
+-- prefix climbs k -= lowbit(k), update climbs k += lowbit(k)
+-- c/w Segment(array, operator.add, 0) : half the slots, no op call per level, but only invertible operators (sums)
+
+Fenwick2D supports the same on a rows x cols matrix, O(log(rows)*log(cols)) per update or query
+"""
+from array import array as typedarray # the constructors below take a parameter named array
+
+class Fenwick:
+	def __init__(self, array=(), typecode="q"):
+		# array : any iterable of numbers
+		self.typecode = typecode
+		self.build(array)
+
+	def build(self, array):
+		tree = self.tree = typedarray(self.typecode, [0])
+		tree.extend(array)
+		self.size = n = len(tree) - 1
+		# each node passes its partial sum to its parent once
+		for k in range(1, n + 1):
+			parent = k + (k & -k)
+			if parent <= n:
+				tree[parent] += tree[k]
+
+	def __len__(self):
+		return self.size
+
+	def update(self, i, delta):
+		tree = self.tree
+		n = self.size
+		k = i + 1
+		while k <= n:
+			tree[k] += delta
+			k += k & -k
+
+	def prefix(self, i):
+		tree = self.tree
+		total = 0
+		k = i + 1
+		while k > 0:
+			total += tree[k]
+			k -= k & -k
+		return total
+
+	def query(self, i, j):
+		if not 0 <= i <= j < self.size:
+			return 0
+		return self.prefix(j) - self.prefix(i - 1)
+
+	def lower_bound(self, target):
+		# descend by powers of 2, skipping every block whose sum stays below target ; return size if none
+		tree = self.tree
+		k = 0
+		step = 1 << self.size.bit_length()
+		while step:
+			if k + step <= self.size and tree[k + step] < target:
+				k += step
+				target -= tree[k]
+			step >>= 1
+		return k
+
+class Fenwick2D:
+	def __init__(self, matrix, typecode="q"):
+		# matrix : non-empty list of equal-length rows
+		self.rows = rows = len(matrix)
+		self.cols = cols = len(matrix[0])
+		self.width = width = cols + 1
+		tree = self.tree = typedarray(typecode, [0]) * ((rows + 1) * width)
+		for r, row in enumerate(matrix, 1):
+			tree[r * width + 1:r * width + width] = typedarray(typecode, row)
+		# O(rows*cols) build : propagate along the columns, then along the rows
+		for r in range(1, rows + 1):
+			base = r * width
+			for c in range(1, cols + 1):
+				parent = c + (c & -c)
+				if parent <= cols:
+					tree[base + parent] += tree[base + c]
+		for r in range(1, rows + 1):
+			parent = r + (r & -r)
+			if parent <= rows:
+				for c in range(1, cols + 1):
+					tree[parent * width + c] += tree[r * width + c]
+
+	def update(self, r, c, delta):
+		tree = self.tree
+		width = self.width
+		i = r + 1
+		while i <= self.rows:
+			j = c + 1
+			while j <= self.cols:
+				tree[i * width + j] += delta
+				j += j & -j
+			i += i & -i
+
+	def prefix(self, r, c):
+		# sum of matrix[0..r][0..c]
+		tree = self.tree
+		width = self.width
+		total = 0
+		i = r + 1
+		while i > 0:
+			j = c + 1
+			while j > 0:
+				total += tree[i * width + j]
+				j -= j & -j
+			i -= i & -i
+		return total
+
+	def query(self, r1, c1, r2, c2):
+		# sum of the sub-matrix with corners (r1, c1) and (r2, c2), inclusive
+		if not (0 <= r1 <= r2 < self.rows and 0 <= c1 <= c2 < self.cols):
+			return 0
+		return self.prefix(r2, c2) - self.prefix(r1 - 1, c2) - self.prefix(r2, c1 - 1) + self.prefix(r1 - 1, c1 - 1)
+
+
+# Benchmark
+import operator
+import random
+import time
+
+def benchmark(n=1000000, m=100000):
+	# the same prefix-sum workload (m point updates, m range queries) on Fenwick and on Segment with operator.add
+	from segment import Segment
+	array = [random.randint(0, 1000) for _ in range(n)]
+	updates = [(random.randrange(n), random.randint(-10, 10)) for _ in range(m)]
+	queries = [sorted(random.sample(range(n), 2)) for _ in range(m)]
+
+	start = time.perf_counter()
+	fenwick = Fenwick(array)
+	build = time.perf_counter() - start
+	start = time.perf_counter()
+	for i, delta in updates:
+		fenwick.update(i, delta)
+	update = time.perf_counter() - start
+	start = time.perf_counter()
+	for i, j in queries:
+		fenwick.query(i, j)
+	query = time.perf_counter() - start
+	print("Fenwick build : %6.3f s, update : %6.3f s, query : %6.3f s, slots : %d" % (build, update, query, len(fenwick.tree)))
+
+	start = time.perf_counter()
+	seg = Segment(array, operator.add, 0)
+	build = time.perf_counter() - start
+	start = time.perf_counter()
+	for i, delta in updates:
+		seg.update(i, seg.tree[seg.size + i] + delta)
+	update = time.perf_counter() - start
+	start = time.perf_counter()
+	for i, j in queries:
+		seg.query(i, j)
+	query = time.perf_counter() - start
+	print("Segment build : %6.3f s, update : %6.3f s, query : %6.3f s, slots : %d" % (build, update, query, len(seg.tree)))
+
+if __name__ == "__main__":
+	fenwick = Fenwick([3,1,2,5,4,2,3,6,2,9])
+	print("sum of array[1:7]", fenwick.query(1,6))
+	fenwick.update(1, 4)
+	print("sum of array[1:7]", fenwick.query(1,6))
+	print("first index whose prefix sum reaches 20", fenwick.lower_bound(20))
+	benchmark()
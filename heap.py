@@ -8,6 +8,7 @@
 3. Heap is usually implemented with array.
 4. Priority queue is usually implemented with heap. (ex. vanilla OS scheduler)
    Stable sort is achieved by comparison among tuples (priority, unique_count, task), instead of priority alone
+   KeyHeap achieves the same with parallel arrays of priorities and counters, avoiding a tuple per element
 
 - Basic Operation:
 # h = θ(log(n)) is the height of the heap (nearly complete binary tree)
@@ -22,59 +23,100 @@
 - Special Operation:
 1. Heapify(T) : In-place heapify any nearly complete binary tree into min(max)-heap, O(n)
 2. Sort(S) : In-place sorting, O(nlog(n))
+3. PushMany(S, X) / PopMany(S, k) : batch push and pop
+4. DecreaseKey(S, x, k) / IncreaseKey(S, x, k) / Remove(S, x) : O(log(n)), IMPLEMENTED IN addressable heap
+   where x is the handle returned by push
+
+- Priority queue interface shared by MinHeap, KeyHeap, MaxHeap, DaryHeap and PairingHeap
+# push(x), push_many(xs), pop(), pop_many(k), minimum(), len(S) ; pop and minimum raise on an empty heap
+# PairingHeap additionally returns a handle from push for decrease_key/remove, and melds in O(1)
 """
 # Universal Implementation
+# sift_up/sift_down are iterative and move a hole instead of swapping, one assignment per level
 class MinHeap:
-	def __init__(self, array):
-		self.heap = array
-		self.size = len(array)
+	def __init__(self, array=None):
+		self.heap = array if array is not None else []
+		self.size = len(self.heap)
 		self.heapify()
 
 	def __str__(self):
 		return str(self.heap)
 
+	def __len__(self):
+		return self.size
+
 	def __swap(self, i, j):
 		temp = self.heap[i]
 		self.heap[i] = self.heap[j]
 		self.heap[j] = temp
 
-	def __heapify_subtree(self, i):
-		left = 2 * i + 1
-		right = 2 * i  + 2
-		if left < self.size and self.heap[left] < self.heap[i]:
-			smallest = left
-		else:
-			smallest = i
-
-		if right < self.size and self.heap[right] < self.heap[smallest]:
-			smallest = right
+	def __sift_down(self, i):
+		# move heap[i] down until both children are not smaller ; O(log(n))
+		heap = self.heap
+		size = self.size
+		x = heap[i]
+		child = 2 * i + 1
+		while child < size:
+			if child + 1 < size and heap[child + 1] < heap[child]:
+				child += 1
+			if not heap[child] < x:
+				break
+			heap[i] = heap[child]
+			i = child
+			child = 2 * i + 1
+		heap[i] = x
 
-		if i != smallest:
-			self.__swap(i, smallest)
-			self.__heapify_subtree(smallest)
+	def __sift_up(self, i):
+		# move heap[i] up until its parent is not larger ; O(log(n))
+		heap = self.heap
+		x = heap[i]
+		while i > 0:
+			p = (i - 1) // 2
+			if not x < heap[p]:
+				break
+			heap[i] = heap[p]
+			i = p
+		heap[i] = x
 
 	def heapify(self):
-		for i in range(len(self.heap) // 2 - 1, -1, -1):
-			self.__heapify_subtree(i)
+		for i in range(self.size // 2 - 1, -1, -1):
+			self.__sift_down(i)
 
 	def push(self, x):
 		self.heap.append(x)
 		self.size += 1
-		curr = self.size - 1
-		p = (curr - 1) // 2
-		while p >= 0 and self.heap[p] > self.heap[curr]:
-			self.__swap(curr, p)
-			curr = p
-			p = (curr - 1) // 2
+		self.__sift_up(self.size - 1)
+
+	def push_many(self, xs):
+		# O(k*log(n + k)) by sifting, or O(n + k) by re-heapifying when k is large
+		xs = list(xs)
+		self.heap.extend(xs)
+		self.size += len(xs)
+		if len(xs) > self.size // 8:
+			self.heapify()
+		else:
+			for i in range(self.size - len(xs), self.size):
+				self.__sift_up(i)
 
 	def pop(self):
+		if not self.size:
+			raise Exception("empty heap")
 		self.size -= 1
-		self.__swap(0, self.size)
-		minimum = self.heap.pop()
-		self.__heapify_subtree(0)
+		last = self.heap.pop()
+		if not self.size:
+			return last
+		minimum = self.heap[0]
+		self.heap[0] = last
+		self.__sift_down(0)
 		return minimum
 
+	def pop_many(self, k):
+		# pop the k (or all the remaining, if fewer) smallest elements in order ; O(k*log(n))
+		return [self.pop() for _ in range(min(k, self.size))]
+
 	def minimum(self):
+		if not self.size:
+			raise Exception("empty heap")
 		return self.heap[0]
 
 	def sort(self):
@@ -82,7 +124,7 @@ class MinHeap:
 		while self.size:
 			self.size -= 1
 			self.__swap(0, self.size)
-			self.__heapify_subtree(0)
+			self.__sift_down(0)
 		self.size = size
 		start = 0
 		end = self.size - 1
@@ -92,22 +134,493 @@ class MinHeap:
 			start += 1
 			end -= 1
 
-# Python built-in Implementation : heapq
-import heapq
+# Addressable Implementation
+# push returns a handle, which records its own position in the heap array,
+# so the priority of any element can be changed or the element removed in O(log(n)) without searching it
+# d : number of children per node, as in DaryHeap (default 2, a binary heap)
+class Handle:
+	__slots__ = ("key", "val", "index")
+
+	def __init__(self, key, val=None):
+		self.key = key # priority
+		self.val = val # satellite data
+		self.index = -1 # position in the heap array ; -1 once popped or removed
+
+class AddressableHeap:
+	def __init__(self, d=2):
+		if d < 2:
+			raise ValueError("d must be at least 2")
+		self.d = d
+		self.heap = []
+
+	def __len__(self):
+		return len(self.heap)
+
+	def sift_up(self, i):
+		heap = self.heap
+		d = self.d
+		x = heap[i]
+		key = x.key
+		while i > 0:
+			p = (i - 1) // d
+			if not key < heap[p].key:
+				break
+			heap[i] = heap[p]
+			heap[i].index = i
+			i = p
+		heap[i] = x
+		x.index = i
+
+	def sift_down(self, i):
+		heap = self.heap
+		size = len(heap)
+		d = self.d
+		x = heap[i]
+		key = x.key
+		first = d * i + 1
+		while first < size:
+			# smallest among the (up to) d children
+			child = first
+			for j in range(first + 1, min(first + d, size)):
+				if heap[j].key < heap[child].key:
+					child = j
+			if not heap[child].key < key:
+				break
+			heap[i] = heap[child]
+			heap[i].index = i
+			i = child
+			first = d * i + 1
+		heap[i] = x
+		x.index = i
+
+	def push(self, key, val=None):
+		x = Handle(key, val)
+		x.index = len(self.heap)
+		self.heap.append(x)
+		self.sift_up(x.index)
+		return x
+
+	def push_many(self, pairs):
+		# push (key, val) pairs and return their handles ; O(n + k) by re-heapifying
+		handles = [Handle(key, val) for key, val in pairs]
+		self.heap.extend(handles)
+		for i, x in enumerate(self.heap):
+			x.index = i
+		for i in range((len(self.heap) - 2) // self.d, -1, -1):
+			self.sift_down(i)
+		return handles
+
+	def pop(self):
+		# return the handle with the minimum key
+		if not self.heap:
+			raise Exception("empty heap")
+		return self.remove(self.heap[0])
+
+	def pop_many(self, k):
+		return [self.pop() for _ in range(min(k, len(self.heap)))]
+
+	def minimum(self):
+		if not self.heap:
+			raise Exception("empty heap")
+		return self.heap[0]
+
+	def update(self, x, key):
+		# change the key of handle x in either direction ; O(log(n))
+		if x.index < 0:
+			raise Exception("handle not in heap")
+		old = x.key
+		x.key = key
+		if key < old:
+			self.sift_up(x.index)
+		else:
+			self.sift_down(x.index)
+
+	def decrease_key(self, x, key):
+		if x.key < key:
+			raise ValueError("new key is larger than the current key")
+		self.update(x, key)
+
+	def increase_key(self, x, key):
+		if key < x.key:
+			raise ValueError("new key is smaller than the current key")
+		self.update(x, key)
+
+	def remove(self, x):
+		# remove handle x from the heap and return it ; O(log(n))
+		i = x.index
+		if i < 0:
+			raise Exception("handle not in heap")
+		last = self.heap.pop()
+		if last is not x:
+			# last fills the hole of x, then moves in whichever direction it violates
+			self.heap[i] = last
+			last.index = i
+			if i > 0 and last.key < self.heap[(i - 1) // self.d].key:
+				self.sift_up(i)
+			else:
+				self.sift_down(i)
+		x.index = -1
+		return x
+
+# Key Implementation
+# Priorities live in a typed array('d') parallel to the payload list, with an insertion counter array('q') next to them,
+# so every comparison is between plain floats and ties pop in FIFO order without (priority, count, task) tuples
+# key(x) gives the priority of x (default : x itself, which must then be a number) ; reverse=True pops the largest first
+from array import array as typedarray # the constructors below take a parameter named array
+
+class KeyHeap:
+	def __init__(self, array=None, key=None, reverse=False):
+		self.key = key
+		self.reverse = reverse
+		self.prio = typedarray("d")
+		self.seq = typedarray("q")
+		self.items = []
+		self.count = 0 # insertion counter for FIFO tie-breaking
+		if array:
+			self.push_many(array)
+
+	def __len__(self):
+		return len(self.items)
+
+	def priority(self, x):
+		p = self.key(x) if self.key else x
+		return -p if self.reverse else p
+
+	def sift_up(self, i):
+		prio, seq, items = self.prio, self.seq, self.items
+		p, s, x = prio[i], seq[i], items[i]
+		while i > 0:
+			parent = (i - 1) // 2
+			pp = prio[parent]
+			if pp < p or (pp == p and seq[parent] < s):
+				break
+			prio[i], seq[i], items[i] = pp, seq[parent], items[parent]
+			i = parent
+		prio[i], seq[i], items[i] = p, s, x
+
+	def sift_down(self, i):
+		prio, seq, items = self.prio, self.seq, self.items
+		size = len(items)
+		p, s, x = prio[i], seq[i], items[i]
+		child = 2 * i + 1
+		while child < size:
+			right = child + 1
+			if right < size and (prio[right] < prio[child] or (prio[right] == prio[child] and seq[right] < seq[child])):
+				child = right
+			pc = prio[child]
+			if p < pc or (p == pc and s < seq[child]):
+				break
+			prio[i], seq[i], items[i] = pc, seq[child], items[child]
+			i = child
+			child = 2 * i + 1
+		prio[i], seq[i], items[i] = p, s, x
+
+	def push(self, x):
+		self.prio.append(self.priority(x))
+		self.seq.append(self.count)
+		self.items.append(x)
+		self.count += 1
+		self.sift_up(len(self.items) - 1)
+
+	def push_many(self, xs):
+		xs = list(xs)
+		self.prio.extend(self.priority(x) for x in xs)
+		self.seq.extend(range(self.count, self.count + len(xs)))
+		self.items.extend(xs)
+		self.count += len(xs)
+		if len(xs) > len(self.items) // 8:
+			for i in range(len(self.items) // 2 - 1, -1, -1):
+				self.sift_down(i)
+		else:
+			for i in range(len(self.items) - len(xs), len(self.items)):
+				self.sift_up(i)
+
+	def pop(self):
+		if not self.items:
+			raise Exception("empty heap")
+		prio, seq, items = self.prio, self.seq, self.items
+		top = items[0]
+		p, s, x = prio.pop(), seq.pop(), items.pop()
+		if items:
+			prio[0], seq[0], items[0] = p, s, x
+			self.sift_down(0)
+		return top
+
+	def pop_many(self, k):
+		return [self.pop() for _ in range(min(k, len(self.items)))]
+
+	def minimum(self):
+		# the element popped next ; the maximum if reverse
+		if not self.items:
+			raise Exception("empty heap")
+		return self.items[0]
+
+class MaxHeap(KeyHeap):
+	def __init__(self, array=None, key=None):
+		super().__init__(array, key, reverse=True)
+
+	def maximum(self):
+		return self.minimum()
+
+# d-ary Implementation
+# Each node has d children at d*i+1 ... d*i+d, so the height is log_d(n) instead of log_2(n)
+# push and decrease are cheaper (fewer levels), pop compares d children per level but touches fewer, adjacent slots
+class DaryHeap:
+	def __init__(self, array=None, d=4):
+		if d < 2:
+			raise ValueError("d must be at least 2")
+		self.d = d
+		self.heap = array if array is not None else []
+		self.heapify()
+
+	def __str__(self):
+		return str(self.heap)
+
+	def __len__(self):
+		return len(self.heap)
+
+	def sift_down(self, i):
+		heap = self.heap
+		size = len(heap)
+		d = self.d
+		x = heap[i]
+		first = d * i + 1
+		while first < size:
+			# smallest among the (up to) d children
+			child = first
+			last = min(first + d, size)
+			for j in range(first + 1, last):
+				if heap[j] < heap[child]:
+					child = j
+			if not heap[child] < x:
+				break
+			heap[i] = heap[child]
+			i = child
+			first = d * i + 1
+		heap[i] = x
+
+	def sift_up(self, i):
+		heap = self.heap
+		d = self.d
+		x = heap[i]
+		while i > 0:
+			p = (i - 1) // d
+			if not x < heap[p]:
+				break
+			heap[i] = heap[p]
+			i = p
+		heap[i] = x
+
+	def heapify(self):
+		for i in range((len(self.heap) - 2) // self.d, -1, -1):
+			self.sift_down(i)
+
+	def push(self, x):
+		self.heap.append(x)
+		self.sift_up(len(self.heap) - 1)
+
+	def push_many(self, xs):
+		xs = list(xs)
+		self.heap.extend(xs)
+		if len(xs) > len(self.heap) // 8:
+			self.heapify()
+		else:
+			for i in range(len(self.heap) - len(xs), len(self.heap)):
+				self.sift_up(i)
+
+	def pop(self):
+		if not self.heap:
+			raise Exception("empty heap")
+		last = self.heap.pop()
+		if not self.heap:
+			return last
+		minimum = self.heap[0]
+		self.heap[0] = last
+		self.sift_down(0)
+		return minimum
+
+	def pop_many(self, k):
+		return [self.pop() for _ in range(min(k, len(self.heap)))]
+
+	def minimum(self):
+		if not self.heap:
+			raise Exception("empty heap")
+		return self.heap[0]
+
+# Pairing Heap Implementation
+# A heap-ordered multiway tree stored as (first child, next sibling) links
+# push, meld : O(1) ; decrease_key : o(log(n)) amortized ; pop, remove : O(log(n)) amortized
+# push returns the node as a handle for decrease_key and remove ; pop returns the element itself
+class PairingNode:
+	__slots__ = ("key", "child", "sibling", "prev")
+
+	def __init__(self, key):
+		self.key = key
+		self.child = None # first child
+		self.sibling = None # next sibling
+		self.prev = None # parent if first child, otherwise previous sibling
+
+class PairingHeap:
+	def __init__(self, array=None):
+		self.root = None
+		self.size = 0
+		if array:
+			self.push_many(array)
+
+	def __len__(self):
+		return self.size
+
+	def link(self, a, b):
+		# make the root with the larger key the first child of the other ; a, b are roots
+		if a is None:
+			return b
+		if b is None:
+			return a
+		if b.key < a.key:
+			a, b = b, a
+		b.prev = a
+		b.sibling = a.child
+		if a.child:
+			a.child.prev = b
+		a.child = b
+		a.sibling = a.prev = None
+		return a
+
+	def combine(self, first):
+		# two-pass pairing of the sibling list starting at first : pair left to right, then link right to left
+		pairs = []
+		while first:
+			a = first
+			b = a.sibling
+			first = b.sibling if b else None
+			a.sibling = a.prev = None
+			if b:
+				b.sibling = b.prev = None
+			pairs.append(self.link(a, b))
+		root = None
+		while pairs:
+			root = self.link(pairs.pop(), root)
+		return root
+
+	def cut(self, x):
+		# detach the subtree rooted at x (not the root) from its parent
+		if x.prev.child is x:
+			x.prev.child = x.sibling
+		else:
+			x.prev.sibling = x.sibling
+		if x.sibling:
+			x.sibling.prev = x.prev
+		x.sibling = x.prev = None
+
+	def push(self, x):
+		node = PairingNode(x)
+		self.root = self.link(self.root, node)
+		self.size += 1
+		return node
+
+	def push_many(self, xs):
+		return [self.push(x) for x in xs]
+
+	def meld(self, other):
+		# move all elements of other into self ; O(1)
+		self.root = self.link(self.root, other.root)
+		self.size += other.size
+		other.root = None
+		other.size = 0
+
+	def pop(self):
+		if self.root is None:
+			raise Exception("empty heap")
+		root = self.root
+		self.root = self.combine(root.child)
+		root.child = None
+		self.size -= 1
+		return root.key
+
+	def pop_many(self, k):
+		return [self.pop() for _ in range(min(k, self.size))]
+
+	def minimum(self):
+		if self.root is None:
+			raise Exception("empty heap")
+		return self.root.key
+
+	def decrease_key(self, node, key):
+		if node.key < key:
+			raise ValueError("new key is larger than the current key")
+		node.key = key
+		if node is not self.root:
+			self.cut(node)
+			self.root = self.link(self.root, node)
+
+	def remove(self, node):
+		# remove the element of node from the heap and return it
+		if node is self.root:
+			return self.pop()
+		self.cut(node)
+		self.root = self.link(self.root, self.combine(node.child))
+		node.child = None
+		self.size -= 1
+		return node.key
+
+# Benchmark
+import random
+import time
+
+def benchmark(sizes=(10000, 100000)):
+	# time per engine for three operation mixes :
+	# bulk : push n, then pop n ; mixed : n times (push, push, pop) ; decrease : push n, decrease n keys, pop n
+	# the decrease mix needs handles : the array heaps are timed through AddressableHeap with the same d
+	engines = [("MinHeap", MinHeap, AddressableHeap)]
+	engines += [("DaryHeap d=%d" % d, lambda array=None, d=d: DaryHeap(array, d), lambda d=d: AddressableHeap(d)) for d in (2, 4, 8)]
+	engines += [("PairingHeap", PairingHeap, PairingHeap)]
+	print("%-14s %8s %10s %10s %10s" % ("engine", "n", "bulk", "mixed", "decrease"))
+	for n in sizes:
+		keys = [random.random() for _ in range(n)]
+		for name, engine, addressable in engines:
+			heap = engine()
+			start = time.perf_counter()
+			for key in keys:
+				heap.push(key)
+			for _ in range(n):
+				heap.pop()
+			bulk = time.perf_counter() - start
+
+			heap = engine()
+			start = time.perf_counter()
+			for key in keys:
+				heap.push(key)
+				heap.push(key)
+				heap.pop()
+			mixed = time.perf_counter() - start
+
+			heap = addressable()
+			start = time.perf_counter()
+			handles = [heap.push(key) for key in keys]
+			for handle in handles:
+				heap.decrease_key(handle, handle.key / 2)
+			for _ in range(n):
+				heap.pop()
+			decrease = time.perf_counter() - start
+			print("%-14s %8d %9.3fs %9.3fs %9.3fs" % (name, n, bulk, mixed, decrease))
 
-a = [0, 3, 1, 5, 4, 2, 9, 6, 7, 8]
-print("unsorted : ", a)
+if __name__ == "__main__":
+	# Python built-in Implementation : heapq
+	import heapq
 
-heapq.heapify(a)
-print("heapified : ", a)
+	a = [0, 3, 1, 5, 4, 2, 9, 6, 7, 8]
+	print("unsorted : ", a)
 
-heapq.heappush(a, 2.5)
-heapq.heappush(a, 1.3)
-print("push 2.5 and 1.3 : ", a)
+	heapq.heapify(a)
+	print("heapified : ", a)
 
-pop1 = heapq.heappop(a)
-pop2 = heapq.heappop(a)
-pop3 = heapq.heappop(a)
-print("pop 3 times : %s, %s, %s" % (pop1, pop2, pop3))
+	heapq.heappush(a, 2.5)
+	heapq.heappush(a, 1.3)
+	print("push 2.5 and 1.3 : ", a)
 
+	pop1 = heapq.heappop(a)
+	pop2 = heapq.heappop(a)
+	pop3 = heapq.heappop(a)
+	print("pop 3 times : %s, %s, %s" % (pop1, pop2, pop3))
 
+	benchmark()
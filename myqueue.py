@@ -0,0 +1,619 @@
+###### Queue ######
+"""
+- First In First Out (FIFO)
+- Basic Operation:
+1. Insert(S, x) : a.k.a. Enqueue/Put ; O(1)
+2. Delete(S) : a.k.a. Dequeue/Get ; O(1)
+3. Search : NOT IMPLEMENTED
+4. Maximum : NOT IMPLEMENTED
+5. Minimum : NOT IMPLEMENTED
+6. Successor : NOT IMPLEMENTED
+7. Predecessor : NOT IMPLEMENTED
+
+- Batch Operation:
+1. PutMany(S, X) : O(k), copied as at most two slices
+2. GetMany(S, k) : O(k), copied as at most two slices
+
+- Ring buffer
+# capacity is a power of 2, so the slot of a position is position & mask instead of position % capacity
+# head and tail only increase ; size = tail - head, which also tells a full queue from an empty one
+# growable : double the capacity when full instead of raising, amortized O(1) put
+# ArrayQueue stores numeric payloads in a typed array and copies batches through memoryview
+
+- Concurrent queues built on the ring buffer
+# BlockingQueue : threads wait on two conditions (not empty, not full) sharing one lock ;
+  put_many/get_many move a whole batch per lock acquisition instead of one item
+# AsyncQueue : asyncio.Queue-compatible (put/get coroutines, put_nowait/get_nowait, qsize/empty/full, task_done/join,
+  maxsize <= 0 meaning unbounded) ;
+  put waits while the queue is full (backpressure), get_many wakes as many waiting producers as slots it frees
+# The module is named myqueue so that it doesn't shadow the standard library queue module
+
+- Shared memory ring (SharedRing) : single producer, single consumer, across processes
+# a byte ring in multiprocessing.shared_memory ; head (consumer) and tail (producer) positions live in the block,
+  each on its own cache line, and each is written by one side only, so no lock is needed
+# records are an 8-byte length followed by the payload, padded to 8 bytes ; a record never wraps around :
+  if it doesn't fit before the end of the ring, a wrap marker is written and the record starts at offset 0
+# so the consumer can read a payload in place through memoryview (peek, then advance) without any copy
+# a record (header included) may take at most half the ring, so an empty ring always has room for the next one
+# the producer publishes tail only after the payload is written ; this relies on aligned 8-byte stores
+  being atomic and ordered, which holds on x86-64 (on weaker memory models it is "lock-free-ish" at best)
+"""
+
+# Universal Implementation
+class MyQueue:
+	def __init__(self, maxsize=16, growable=False):
+		# maxsize : maximal number of items, or the initial capacity if growable
+		if maxsize < 1:
+			raise ValueError("maxsize must be positive")
+		self.maxsize = maxsize
+		self.growable = growable
+		capacity = 1 << (maxsize - 1).bit_length() # smallest power of 2 >= maxsize
+		self.array = self.allocate(capacity)
+		self.mask = capacity - 1
+		self.head = 0 # position of the next get
+		self.tail = 0 # position of the next put
+
+	def allocate(self, capacity):
+		return [None] * capacity
+
+	def __len__(self):
+		return self.tail - self.head
+
+	def full(self):
+		return self.tail - self.head == self.maxsize
+
+	def empty(self):
+		return self.tail == self.head
+
+	def reserve(self, k):
+		# make room for k more items, or raise if the queue is bounded
+		if self.tail - self.head + k <= self.maxsize:
+			return
+		if not self.growable:
+			raise Exception("full queue")
+		size = self.tail - self.head
+		capacity = self.mask + 1
+		while capacity < size + k:
+			capacity *= 2
+		array = self.allocate(capacity)
+		array[:size] = self.read(self.head, size)
+		self.array = array
+		self.mask = capacity - 1
+		self.maxsize = capacity
+		self.head = 0
+		self.tail = size
+
+	def read(self, position, k):
+		# copy of the k items starting at position, as at most two slices
+		start = position & self.mask
+		first = min(k, self.mask + 1 - start)
+		if first == k:
+			return self.array[start:start + k]
+		return self.array[start:] + self.array[:k - first]
+
+	def put(self, x):
+		if self.tail - self.head == self.maxsize:
+			self.reserve(1)
+		self.array[self.tail & self.mask] = x
+		self.tail += 1
+
+	def put_many(self, xs):
+		xs = self.convert(xs)
+		k = len(xs)
+		self.reserve(k)
+		start = self.tail & self.mask
+		first = min(k, self.mask + 1 - start)
+		self.array[start:start + first] = xs[:first]
+		self.array[:k - first] = xs[first:]
+		self.tail += k
+
+	def convert(self, xs):
+		return list(xs)
+
+	def get(self):
+		if self.tail == self.head:
+			raise Exception("empty queue")
+		i = self.head & self.mask
+		x = self.array[i]
+		self.array[i] = None # drop the reference held by the buffer
+		self.head += 1
+		return x
+
+	def get_many(self, k):
+		# get up to k items
+		k = min(k, self.tail - self.head)
+		xs = self.read(self.head, k)
+		self.clear(self.head, k)
+		self.head += k
+		return xs
+
+	def clear(self, position, k):
+		start = position & self.mask
+		first = min(k, self.mask + 1 - start)
+		self.array[start:start + first] = [None] * first
+		self.array[:k - first] = [None] * (k - first)
+
+# Typed Array Implementation
+from array import array as typedarray # the queues above keep their items in an attribute named array
+
+class ArrayQueue(MyQueue):
+	def __init__(self, maxsize=16, growable=False, typecode="d"):
+		self.typecode = typecode
+		super().__init__(maxsize, growable)
+
+	def allocate(self, capacity):
+		return typedarray(self.typecode, bytes(capacity * typedarray(self.typecode).itemsize))
+
+	def convert(self, xs):
+		if isinstance(xs, typedarray) and xs.typecode == self.typecode:
+			return xs
+		return typedarray(self.typecode, xs)
+
+	def put_many(self, xs):
+		# copy a typed batch into the ring through memoryview, without creating item objects
+		xs = self.convert(xs)
+		k = len(xs)
+		self.reserve(k)
+		start = self.tail & self.mask
+		first = min(k, self.mask + 1 - start)
+		with memoryview(self.array) as view, memoryview(xs) as source:
+			view[start:start + first] = source[:first]
+			view[:k - first] = source[first:]
+		self.tail += k
+
+	def get(self):
+		if self.tail == self.head:
+			raise Exception("empty queue")
+		x = self.array[self.head & self.mask]
+		self.head += 1
+		return x
+
+	def get_many(self, k):
+		# return up to k items as a typed array
+		k = min(k, self.tail - self.head)
+		xs = self.read(self.head, k)
+		self.head += k
+		return xs
+
+
+# Thread-safe Implementation
+import threading
+
+class BlockingQueue:
+	def __init__(self, maxsize=16):
+		self.queue = MyQueue(maxsize)
+		self.lock = threading.Lock()
+		self.not_empty = threading.Condition(self.lock)
+		self.not_full = threading.Condition(self.lock)
+
+	def __len__(self):
+		with self.lock:
+			return len(self.queue)
+
+	def put(self, x, timeout=None):
+		# block until there is room, or raise after timeout seconds
+		with self.not_full:
+			if not self.not_full.wait_for(lambda: not self.queue.full(), timeout):
+				raise Exception("full queue")
+			self.queue.put(x)
+			self.not_empty.notify()
+
+	def put_many(self, xs, timeout=None):
+		# put the batch in as few lock acquisitions as the free room allows ; the timeout applies to each wait
+		xs = list(xs)
+		i = 0
+		while i < len(xs):
+			with self.not_full:
+				if not self.not_full.wait_for(lambda: not self.queue.full(), timeout):
+					raise Exception("full queue")
+				k = min(len(xs) - i, self.queue.maxsize - len(self.queue))
+				self.queue.put_many(xs[i:i + k])
+				self.not_empty.notify(k)
+			i += k
+
+	def get(self, timeout=None):
+		# block until there is an item, or raise after timeout seconds
+		with self.not_empty:
+			if not self.not_empty.wait_for(lambda: not self.queue.empty(), timeout):
+				raise Exception("empty queue")
+			x = self.queue.get()
+			self.not_full.notify()
+			return x
+
+	def get_many(self, k, timeout=None):
+		# block until there is at least one item, then take up to k items at once ; return [] after timeout seconds
+		with self.not_empty:
+			if not self.not_empty.wait_for(lambda: not self.queue.empty(), timeout):
+				return []
+			xs = self.queue.get_many(k)
+			self.not_full.notify(len(xs))
+			return xs
+
+# Asyncio Implementation
+# waiting coroutines park on futures, woken one at a time like asyncio.Queue
+import asyncio
+from collections import deque
+
+class AsyncQueue:
+	def __init__(self, maxsize=16):
+		# maxsize <= 0 : unbounded, the ring grows instead
+		self.maxsize = maxsize
+		self.queue = MyQueue(maxsize, growable=False) if maxsize > 0 else MyQueue(16, growable=True)
+		self.getters = deque()
+		self.putters = deque()
+		self.unfinished = 0 # items put but not yet marked done by task_done
+		self.finished = asyncio.Event()
+		self.finished.set()
+
+	def qsize(self):
+		return len(self.queue)
+
+	def empty(self):
+		return self.queue.empty()
+
+	def full(self):
+		return 0 < self.maxsize <= len(self.queue)
+
+	def room(self):
+		# number of items that can be put without waiting
+		return self.maxsize - len(self.queue) if self.maxsize > 0 else float("inf")
+
+	def added(self, k):
+		self.unfinished += k
+		self.finished.clear()
+
+	def task_done(self):
+		if self.unfinished <= 0:
+			raise ValueError("task_done() called too many times")
+		self.unfinished -= 1
+		if not self.unfinished:
+			self.finished.set()
+
+	async def join(self):
+		# wait until every item put has been marked done by task_done
+		if self.unfinished:
+			await self.finished.wait()
+
+	def wakeup(self, waiters, k=1):
+		# wake up to k waiters still waiting
+		while waiters and k:
+			waiter = waiters.popleft()
+			if not waiter.done():
+				waiter.set_result(None)
+				k -= 1
+
+	async def wait(self, waiters, blocked):
+		# park on waiters until blocked() is False
+		while blocked():
+			waiter = asyncio.get_running_loop().create_future()
+			waiters.append(waiter)
+			try:
+				await waiter
+			except BaseException:
+				waiter.cancel()
+				if waiter in waiters:
+					waiters.remove(waiter)
+				elif not blocked():
+					self.wakeup(waiters) # pass the wake-up on to the next waiter
+				raise
+
+	async def put(self, x):
+		await self.wait(self.putters, self.full)
+		self.put_nowait(x)
+
+	def put_nowait(self, x):
+		if self.full():
+			raise asyncio.QueueFull
+		self.queue.put(x)
+		self.added(1)
+		self.wakeup(self.getters)
+
+	async def put_many(self, xs):
+		xs = list(xs)
+		i = 0
+		while i < len(xs):
+			await self.wait(self.putters, self.full)
+			k = min(len(xs) - i, self.room())
+			self.queue.put_many(xs[i:i + k])
+			self.added(k)
+			self.wakeup(self.getters, k)
+			i += k
+
+	async def get(self):
+		await self.wait(self.getters, self.queue.empty)
+		return self.get_nowait()
+
+	def get_nowait(self):
+		if self.queue.empty():
+			raise asyncio.QueueEmpty
+		x = self.queue.get()
+		self.wakeup(self.putters)
+		return x
+
+	async def get_many(self, k):
+		# wait for at least one item, then take up to k items at once
+		await self.wait(self.getters, self.queue.empty)
+		xs = self.queue.get_many(k)
+		self.wakeup(self.putters, len(xs))
+		if not self.queue.empty():
+			self.wakeup(self.getters)
+		return xs
+
+
+# Shared Memory Implementation
+import time
+from multiprocessing import shared_memory
+
+WRAP = -1 # length of the marker sending the consumer back to offset 0
+
+class SharedRing:
+	HEADER = 192 # capacity at 0, head at 64, tail at 128 : one cache line each
+
+	def __init__(self, capacity=1 << 20, name=None):
+		# create a ring of capacity bytes (rounded up to a power of 2) if name is None,
+		# otherwise attach to the ring created by another process under that name
+		if name is None:
+			capacity = 1 << max(3, (capacity - 1).bit_length())
+			self.shm = shared_memory.SharedMemory(create=True, size=self.HEADER + capacity)
+			self.owner = True
+		else:
+			self.shm = shared_memory.SharedMemory(name=name)
+			self.owner = False
+		self.words = self.shm.buf.cast("q")
+		if name is None:
+			self.words[0] = capacity
+			self.words[8] = 0
+			self.words[16] = 0
+		self.capacity = self.words[0]
+		self.mask = self.capacity - 1
+		self.data = self.shm.buf[self.HEADER:self.HEADER + self.capacity]
+		self.pending = 0 # size of the record returned by peek, not yet released by advance
+
+	@property
+	def name(self):
+		return self.shm.name
+
+	def __len__(self):
+		# bytes in use
+		return self.words[16] - self.words[8]
+
+	def close(self):
+		self.data.release()
+		self.words.release()
+		self.shm.close()
+		if self.owner:
+			self.shm.unlink()
+
+	def try_put(self, payload):
+		# producer : copy payload into the ring and publish it ; return False if there is no room
+		n = len(payload)
+		size = 8 + (n + 7) // 8 * 8
+		# a record wrapping at the end also costs the skipped bytes (less than size), so with size <= capacity // 2
+		# an empty ring always has room for it
+		if size > self.capacity // 2:
+			raise ValueError("record larger than half the ring")
+		tail = self.words[16]
+		pos = tail & self.mask
+		skip = self.capacity - pos if pos + size > self.capacity else 0
+		if tail + skip + size - self.words[8] > self.capacity:
+			return False
+		if skip:
+			self.words[(self.HEADER + pos) // 8] = WRAP
+			tail += skip
+			pos = 0
+		self.words[(self.HEADER + pos) // 8] = n
+		self.data[pos + 8:pos + 8 + n] = payload
+		self.words[16] = tail + size # publish
+		return True
+
+	def put(self, payload, timeout=None):
+		# producer : spin (yielding the CPU) until there is room, or raise after timeout seconds
+		deadline = None if timeout is None else time.monotonic() + timeout
+		while not self.try_put(payload):
+			if deadline is not None and time.monotonic() > deadline:
+				raise Exception("full queue")
+			time.sleep(0)
+
+	def try_peek(self):
+		# consumer : memoryview of the next payload inside the ring, or None if empty
+		# the view stays valid until advance() ; release it before then if it was kept
+		head = self.words[8]
+		while head != self.words[16]:
+			pos = head & self.mask
+			n = self.words[(self.HEADER + pos) // 8]
+			if n == WRAP:
+				head += self.capacity - pos
+				self.words[8] = head
+				continue
+			self.pending = 8 + (n + 7) // 8 * 8
+			return self.data[pos + 8:pos + 8 + n]
+		return None
+
+	def peek(self, timeout=None):
+		deadline = None if timeout is None else time.monotonic() + timeout
+		while True:
+			view = self.try_peek()
+			if view is not None:
+				return view
+			if deadline is not None and time.monotonic() > deadline:
+				raise Exception("empty queue")
+			time.sleep(0)
+
+	def advance(self):
+		# consumer : release the record returned by peek, handing its room back to the producer
+		self.words[8] += self.pending
+		self.pending = 0
+
+	def get(self, timeout=None):
+		# consumer : copy of the next payload as bytes
+		with self.peek(timeout) as view:
+			payload = bytes(view)
+		self.advance()
+		return payload
+
+
+# Benchmark
+import multiprocessing
+import queue
+import random
+import struct
+
+def benchmark(n=1000000, batch=64):
+	# producer/consumer : n items through the queue, one by one and in batches
+	items = [random.random() for _ in range(n)]
+	batches = [items[i:i + batch] for i in range(0, n, batch)]
+
+	q = deque()
+	start = time.perf_counter()
+	for x in items:
+		q.append(x)
+		q.popleft()
+	single = time.perf_counter() - start
+	start = time.perf_counter()
+	for xs in batches:
+		q.extend(xs)
+		[q.popleft() for _ in range(len(xs))]
+	print("deque      : one by one %6.3f s, batched %6.3f s" % (single, time.perf_counter() - start))
+
+	for q in (MyQueue(4 * batch), ArrayQueue(4 * batch)):
+		start = time.perf_counter()
+		for x in items:
+			q.put(x)
+			q.get()
+		single = time.perf_counter() - start
+		start = time.perf_counter()
+		for xs in batches:
+			q.put_many(xs)
+			q.get_many(batch)
+		print("%-10s : one by one %6.3f s, batched %6.3f s" % (type(q).__name__, single, time.perf_counter() - start))
+
+def concurrent_benchmark(n=200000, producers=4, consumers=4, batch=64, maxsize=1024):
+	# multi-producer/multi-consumer throughput : queue.Queue one by one versus BlockingQueue and AsyncQueue in batches
+	# a single None is put after all the producers finish ; each consumer puts it back for the others before leaving
+	def run(produce, consume, stop):
+		counts = []
+		def consumer():
+			count = 0
+			while True:
+				xs = consume()
+				if xs and xs[-1] is None:
+					counts.append(count + len(xs) - 1)
+					stop()
+					return
+				count += len(xs)
+		threads = [threading.Thread(target=produce, args=(n // producers,)) for _ in range(producers)]
+		threads += [threading.Thread(target=consumer) for _ in range(consumers)]
+		start = time.perf_counter()
+		for thread in threads:
+			thread.start()
+		for thread in threads[:producers]:
+			thread.join()
+		stop()
+		for thread in threads[producers:]:
+			thread.join()
+		return sum(counts) / (time.perf_counter() - start)
+
+	q = queue.Queue(maxsize)
+	def produce(k):
+		for i in range(k):
+			q.put(i)
+	print("queue.Queue   : %10.0f items/s" % run(produce, lambda: [q.get()], lambda: q.put(None)))
+
+	b = BlockingQueue(maxsize)
+	def produce(k):
+		for i in range(0, k, batch):
+			b.put_many(range(i, min(i + batch, k)))
+	print("BlockingQueue : %10.0f items/s" % run(produce, lambda: b.get_many(batch), lambda: b.put(None)))
+
+	async def pipeline():
+		a = AsyncQueue(maxsize)
+		async def produce(k):
+			for i in range(0, k, batch):
+				await a.put_many(range(i, min(i + batch, k)))
+		async def consume():
+			count = 0
+			while True:
+				xs = await a.get_many(batch)
+				if xs[-1] is None:
+					await a.put(None)
+					return count + len(xs) - 1
+				count += len(xs)
+		start = time.perf_counter()
+		consumer_tasks = [asyncio.ensure_future(consume()) for _ in range(consumers)]
+		await asyncio.gather(*(produce(n // producers) for _ in range(producers)))
+		await a.put(None)
+		count = sum(await asyncio.gather(*consumer_tasks))
+		return count / (time.perf_counter() - start)
+	print("AsyncQueue    : %10.0f items/s" % asyncio.run(pipeline()))
+
+def ring_consumer(name, n, result):
+	# read n records stamped with the send time (time.monotonic_ns is system-wide) ; report the mean latency
+	ring = SharedRing(name=name)
+	total = 0
+	for _ in range(n):
+		with ring.peek() as view:
+			total += time.monotonic_ns() - struct.unpack_from("<q", view)[0]
+		ring.advance()
+	ring.close()
+	result.put(total / n)
+
+def queue_consumer(q, n, result):
+	total = 0
+	for _ in range(n):
+		total += time.monotonic_ns() - struct.unpack_from("<q", q.get())[0]
+	result.put(total / n)
+
+def shared_benchmark(n=200000, sizes=(64, 4096)):
+	# cross-process throughput and mean latency : SharedRing versus multiprocessing.Queue
+	for size in sizes:
+		payload = bytearray(size)
+		result = multiprocessing.Queue()
+
+		ring = SharedRing(1 << 22)
+		consumer = multiprocessing.Process(target=ring_consumer, args=(ring.name, n, result))
+		consumer.start()
+		start = time.perf_counter()
+		for _ in range(n):
+			struct.pack_into("<q", payload, 0, time.monotonic_ns())
+			ring.put(payload)
+		latency = result.get()
+		elapsed = time.perf_counter() - start
+		consumer.join()
+		ring.close()
+		print("SharedRing            %5d bytes : %9.0f msg/s, mean latency %8.1f us" % (size, n / elapsed, latency / 1000))
+
+		q = multiprocessing.Queue(1 << 12)
+		consumer = multiprocessing.Process(target=queue_consumer, args=(q, n, result))
+		consumer.start()
+		start = time.perf_counter()
+		for _ in range(n):
+			struct.pack_into("<q", payload, 0, time.monotonic_ns())
+			q.put(bytes(payload))
+		latency = result.get()
+		elapsed = time.perf_counter() - start
+		consumer.join()
+		print("multiprocessing.Queue %5d bytes : %9.0f msg/s, mean latency %8.1f us" % (size, n / elapsed, latency / 1000))
+
+
+if __name__ == "__main__":
+	# Python built-in Implementation : collections.deque, queue.Queue
+	from collections import deque # non-blocking but also thread-safe, simpler to use
+	q = deque() # maxsize=float('inf')
+	q.append(3) # put 3
+	q.append(4) # put 4
+	q.popleft() # get 3
+	q.popleft() # get 4
+	# q.popleft() # queue empty : raise IndexError
+
+	from queue import Queue # default blocking, better use in multithreading scenario
+	q = Queue(maxsize=3)
+	q.put(4)
+	q.put(5)
+	q.get() # get 4
+	q.put(6)
+	q.put(7)
+	# q.put(8) # queue full : thread blocks until another thread retrieves from the queue
+
+	benchmark()
+	concurrent_benchmark()
+	shared_benchmark()
@@ -0,0 +1,127 @@
+###### Pool Allocator ######
+"""
+Slot allocator for the array implementations of the linked lists
+1. Each slot holds an item (in a list) and its links (next, and prev for doubly linked lists) in typed arrays,
+   so a link costs 8 bytes instead of a reference to an int object.
+2. Slot 0 is reserved for the sentinel node of the list.
+3. Free slots are chained through the next column (free list), so a released slot is reused by the next allocation.
+4. When no slot is free, the capacity doubles (geometric growth), so allocation is amortized O(1) without any hard cap.
+5. compact() moves the live slots to a dense prefix, rewrites the links and shrinks the capacity ;
+   it returns the mapping from old to new slot indices, since every handle the owner kept changes.
+
+- Operation:
+1. alloc(item) : return the slot index holding item, amortized O(1)
+2. release(i) : return slot i to the free list, O(1)
+3. compact() : O(capacity)
+"""
+from array import array
+
+class Pool:
+	def __init__(self, capacity=16, doubly=False):
+		# capacity : number of allocatable slots, excluding the sentinel slot 0
+		self.items = [None]
+		self.next = array("q", [0])
+		self.prev = array("q", [0]) if doubly else None
+		self.free = 0 # head of the free list ; 0 means no free slot
+		self.size = 0 # number of allocated slots, excluding the sentinel
+		self.grow(max(1, capacity))
+
+	def __len__(self):
+		return self.size
+
+	@property
+	def capacity(self):
+		return len(self.items) - 1
+
+	def grow(self, k):
+		# append k free slots and chain them in front of the free list
+		if k <= 0:
+			return
+		start = len(self.items)
+		self.items.extend([None] * k)
+		self.next.extend(range(start + 1, start + k + 1))
+		self.next[start + k - 1] = self.free
+		if self.prev is not None:
+			self.prev.extend(array("q", bytes(8 * k)))
+		self.free = start
+
+	def alloc(self, item):
+		if not self.free:
+			self.grow(len(self.items)) # double
+		i = self.free
+		self.free = self.next[i]
+		self.items[i] = item
+		self.size += 1
+		return i
+
+	def release(self, i):
+		self.items[i] = None
+		self.next[i] = self.free
+		self.free = i
+		self.size -= 1
+
+	def compact(self, slack=16):
+		# move live slots to 1..size in index order, then keep only slack free slots
+		free = set()
+		i = self.free
+		while i:
+			free.add(i)
+			i = self.next[i]
+		mapping = array("q", bytes(8 * len(self.items))) # old index -> new index ; 0 for free slots
+		items = [self.items[0]]
+		for old in range(1, len(self.items)):
+			if old not in free:
+				mapping[old] = len(items)
+				items.append(self.items[old])
+		nxt = array("q", [mapping[self.next[0]]])
+		prev = array("q", [mapping[self.prev[0]]]) if self.prev is not None else None
+		for old in range(1, len(self.items)):
+			if mapping[old]:
+				nxt.append(mapping[self.next[old]])
+				if prev is not None:
+					prev.append(mapping[self.prev[old]])
+		self.items = items
+		self.next = nxt
+		self.prev = prev
+		self.free = 0
+		self.grow(slack)
+		return mapping
+
+
+# Benchmark
+import random
+import time
+
+def benchmark(n=100000, rounds=10):
+	# churn : keep about n live nodes while inserting and deleting n nodes per round
+	from doublylinkedlist import DoublyLinkedList, Node as DoublyNode
+	from singlylinkedlist import SinglyLinkedList, Node as SinglyNode
+	lst = DoublyLinkedList(16)
+	handles = [lst.insert(DoublyNode(i)) for i in range(n)]
+	start = time.perf_counter()
+	for _ in range(rounds):
+		random.shuffle(handles)
+		for i in range(n):
+			lst.delete(handles[i])
+			handles[i] = lst.insert(DoublyNode(i))
+	churn = time.perf_counter() - start
+	print("DoublyLinkedList churn : %9.0f ops/s, capacity %d for %d live nodes" % (2 * n * rounds / churn, lst.pool.capacity, len(lst)))
+	for i in handles[:n // 2]:
+		lst.delete(i)
+	start = time.perf_counter()
+	lst.compact()
+	print("DoublyLinkedList compact : %.3f s, capacity %d for %d live nodes" % (time.perf_counter() - start, lst.pool.capacity, len(lst)))
+
+	lst = SinglyLinkedList(16)
+	start = time.perf_counter()
+	for _ in range(rounds):
+		nodes = [SinglyNode(i) for i in range(n)]
+		for x in nodes:
+			lst.insert(x)
+		for x in reversed(nodes): # newest first : each delete finds its node at the head
+			lst.delete(x)
+	churn = time.perf_counter() - start
+	print("SinglyLinkedList churn : %9.0f ops/s, capacity %d after %d rounds" % (2 * n * rounds / churn, lst.pool.capacity, rounds))
+
+if __name__ == "__main__":
+	benchmark()
@@ -1,56 +1,381 @@
 ###### Segment Tree ######
 """
-Support dynamic range minimum query with following methods
-1. update(i, val) : O(log(n))
-2. getmin(i, j) : O(log(n))
-* segment tree : 2*n - 1 nodes
+Support dynamic range query under an associative operator op with identity (default : min, inf)
+such as min, max, operator.add (sum), math.gcd or any monoid, with following methods
+1. build(array) : O(n)
+2. update(i, val) : O(log(n))
+3. query(i, j) : op over array[i..j] (inclusive), O(log(n))
+* segment tree : 2*n slots in a flat list, built bottom-up without recursion
+-- tree[n + i] is the leaf holding array[i]
+-- tree[k] = op(tree[2k], tree[2k + 1]) for 1 <= k < n ; tree[0] is unused
+-- for any n (not only powers of 2), a query climbs from both ends of the range, combining the nodes fully inside it
+-- op doesn't need to be commutative : the left and right partial results are kept apart and combined in order
+
+Lazy propagation (LazySegment) : range updates without touching every leaf, op must be min, max or operator.add
+1. update_range(i, j, delta) : add delta to array[i..j], O(log(n))
+2. assign_range(i, j, val) : set array[i..j] to val, O(log(n))
+3. query(i, j) : O(log(n))
+* lazy segment tree : 2*size slots, size = smallest power of 2 >= n
+-- each internal node keeps a pending tag (assigned value, added delta) which is pushed to its children
+   only when a later update or query needs to go below it
+
+Batched range minimum query : query_many(i, j) answers the queries (i[0], j[0]), (i[1], j[1]), ... in one call
+1. NumpySegment : the same 2*n tree in a NumPy array ; levels are built with vectorized np.minimum,
+   and a batch climbs all its queries together, O(log(n)) vectorized steps
+2. SparseTable : static, table[k][i] = min(array[i..i + 2^k - 1]) ; O(nlog(n)) build, O(1) query
+   as two overlapping power-of-2 blocks cover any range
+* NumPy is optional : vector_segment(array) returns a NumpySegment if NumPy is available, otherwise a Segment,
+  and SparseTable keeps its table in NumPy arrays or in lists accordingly
 """
+import operator
+
+try:
+	import numpy as np
+except ImportError: # vectorized backends are optional
+	np = None
+
 class Segment:
-	def __init__(self, array):
-		# array : non-empty
-		self.array = array
-		self.size = len(array)
-		self.mintree = [0] * (4 * self.size - 1) # the exact tree size = 2 ^ (ceil(log(n, 2)) + 1) - 1
-		# build
-		def build(index, l, r):
-			if l == r:
-				self.mintree[index] = self.array[l]
-			else:
-				mid = (l + r) // 2
-				self.mintree[index] = min(build(2 * index + 1, l, mid), build(2 * index + 2, mid + 1, r))
-			return self.mintree[index]
-		build(0, 0, self.size - 1)
-	def __update(self, index, l, r, i, val):
-		if l <= i <= r:
-			if l == r:
-				self.mintree[index] = self.array[i] = val
+	def __init__(self, array, op=min, identity=float('inf')):
+		# array : any non-empty iterable
+		self.op = op
+		self.identity = identity
+		self.build(array)
+
+	def build(self, array):
+		leaves = list(array)
+		self.size = n = len(leaves)
+		tree = self.tree = [self.identity] * n + leaves
+		op = self.op
+		for k in range(n - 1, 0, -1):
+			tree[k] = op(tree[2 * k], tree[2 * k + 1])
+
+	@property
+	def array(self):
+		return self.tree[self.size:]
+
+	def update(self, i, val):
+		tree = self.tree
+		op = self.op
+		k = i + self.size
+		tree[k] = val
+		k //= 2
+		while k:
+			tree[k] = op(tree[2 * k], tree[2 * k + 1])
+			k //= 2
+
+	def query(self, i, j):
+		if not 0 <= i <= j < self.size:
+			return self.identity
+		tree = self.tree
+		op = self.op
+		left = right = self.identity
+		# [l, r) in leaf positions ; a left end which is a right child (or a right end which is a left child) is taken alone
+		l = i + self.size
+		r = j + self.size + 1
+		while l < r:
+			if l & 1:
+				left = op(left, tree[l])
+				l += 1
+			if r & 1:
+				r -= 1
+				right = op(tree[r], right)
+			l //= 2
+			r //= 2
+		return op(left, right)
+
+	def query_many(self, i, j):
+		return [self.query(a, b) for a, b in zip(i, j)]
+
+class LazySegment:
+	def __init__(self, array, op=min, identity=None):
+		# array : any non-empty iterable ; op : min, max or operator.add
+		# identity : defaults to inf for min, -inf for max and 0 for operator.add
+		if op not in (min, max, operator.add):
+			raise ValueError("op must be min, max or operator.add")
+		if identity is None:
+			identity = float('inf') if op is min else float('-inf') if op is max else 0
+		self.op = op
+		self.identity = identity
+		self.scale = op is operator.add # a tag applies once per leaf under a sum node
+		leaves = list(array)
+		self.n = len(leaves)
+		self.log = max(0, (self.n - 1).bit_length())
+		self.size = size = 1 << self.log
+		self.tree = [identity] * size + leaves + [identity] * (size - self.n)
+		self.assigned = [None] * size # pending assignment of internal nodes
+		self.added = [0] * size # pending delta of internal nodes, applied after the assignment
+		for k in range(size - 1, 0, -1):
+			self.pull(k)
+
+	def pull(self, k):
+		self.tree[k] = self.op(self.tree[2 * k], self.tree[2 * k + 1])
+
+	def apply(self, k, val, delta):
+		# apply the tag (val, delta) to node k, and record it if k has children
+		if self.scale:
+			length = self.size >> (k.bit_length() - 1)
+			if val is not None:
+				self.tree[k] = val * length
+			self.tree[k] += delta * length
+		else:
+			if val is not None:
+				self.tree[k] = val
+			self.tree[k] += delta
+		if k < self.size:
+			if val is not None:
+				self.assigned[k] = val
+				self.added[k] = delta
 			else:
-				mid = (l + r) // 2
-				self.mintree[index] = min(self.__update(2 * index + 1, l, mid, i, val), self.__update(2 * index + 2, mid + 1, r, i, val))
-		return self.mintree[index]
+				self.added[k] += delta
+
+	def push(self, k):
+		val = self.assigned[k]
+		delta = self.added[k]
+		if val is not None or delta:
+			self.apply(2 * k, val, delta)
+			self.apply(2 * k + 1, val, delta)
+			self.assigned[k] = None
+			self.added[k] = 0
+
+	def update(self, l, r, val, delta):
+		# apply the tag (val, delta) to leaves [l, r)
+		l += self.size
+		r += self.size
+		for i in range(self.log, 0, -1):
+			if (l >> i) << i != l:
+				self.push(l >> i)
+			if (r >> i) << i != r:
+				self.push((r - 1) >> i)
+		l0, r0 = l, r
+		while l < r:
+			if l & 1:
+				self.apply(l, val, delta)
+				l += 1
+			if r & 1:
+				r -= 1
+				self.apply(r, val, delta)
+			l //= 2
+			r //= 2
+		l, r = l0, r0
+		for i in range(1, self.log + 1):
+			if (l >> i) << i != l:
+				self.pull(l >> i)
+			if (r >> i) << i != r:
+				self.pull((r - 1) >> i)
+
+	def update_range(self, i, j, delta):
+		# add delta to array[i..j]
+		if 0 <= i <= j < self.n:
+			self.update(i, j + 1, None, delta)
+
+	def assign_range(self, i, j, val):
+		# set array[i..j] to val
+		if 0 <= i <= j < self.n:
+			self.update(i, j + 1, val, 0)
+
+	def query(self, i, j):
+		if not 0 <= i <= j < self.n:
+			return self.identity
+		l = i + self.size
+		r = j + self.size + 1
+		for k in range(self.log, 0, -1):
+			if (l >> k) << k != l:
+				self.push(l >> k)
+			if (r >> k) << k != r:
+				self.push((r - 1) >> k)
+		tree = self.tree
+		op = self.op
+		left = right = self.identity
+		while l < r:
+			if l & 1:
+				left = op(left, tree[l])
+				l += 1
+			if r & 1:
+				r -= 1
+				right = op(tree[r], right)
+			l //= 2
+			r //= 2
+		return op(left, right)
+
+
+class NumpySegment:
+	# range minimum segment tree with the layout of Segment, stored in a NumPy array
+	def __init__(self, array):
+		leaves = np.asarray(array if hasattr(array, "__len__") else list(array))
+		if leaves.dtype.kind == "f":
+			self.identity = np.inf
+		else:
+			leaves = leaves.astype(np.int64)
+			self.identity = np.iinfo(np.int64).max
+		self.size = n = len(leaves)
+		tree = self.tree = np.empty(2 * n, dtype=leaves.dtype)
+		tree[0] = self.identity
+		tree[n:] = leaves
+		# nodes [lo, hi) only depend on nodes >= hi once lo >= hi / 2, so each block is one vectorized step
+		hi = n
+		while hi > 1:
+			lo = (hi + 1) // 2
+			np.minimum(tree[2 * lo:2 * hi:2], tree[2 * lo + 1:2 * hi:2], out=tree[lo:hi])
+			hi = lo
+
+	@property
+	def array(self):
+		return self.tree[self.size:]
 
 	def update(self, i, val):
-		self.__update(0, 0, self.size - 1, i, val)
+		tree = self.tree
+		k = i + self.size
+		tree[k] = val
+		k //= 2
+		while k:
+			tree[k] = min(tree[2 * k], tree[2 * k + 1])
+			k //= 2
+
+	def query(self, i, j):
+		if not 0 <= i <= j < self.size:
+			return self.identity
+		tree = self.tree
+		result = self.identity
+		l = i + self.size
+		r = j + self.size + 1
+		while l < r:
+			if l & 1:
+				result = min(result, tree[l])
+				l += 1
+			if r & 1:
+				r -= 1
+				result = min(result, tree[r])
+			l //= 2
+			r //= 2
+		return result
+
+	def query_many(self, i, j):
+		# i, j : array-likes of valid inclusive bounds ; return an array of minima
+		tree = self.tree
+		last = 2 * self.size - 1
+		l = np.asarray(i, dtype=np.int64) + self.size
+		r = np.asarray(j, dtype=np.int64) + self.size + 1
+		result = np.full(len(l), self.identity, dtype=tree.dtype)
+		while True:
+			active = l < r
+			if not active.any():
+				return result
+			take = active & (l & 1 == 1)
+			np.minimum(result, tree[np.minimum(l, last)], out=result, where=take)
+			l += take
+			take = active & (r & 1 == 1)
+			r -= take
+			np.minimum(result, tree[np.minimum(r, last)], out=result, where=take)
+			l >>= 1
+			r >>= 1
+
+def vector_segment(array):
+	# range minimum segment tree on the NumPy backend, falling back to the pure-Python Segment
+	if np is not None:
+		return NumpySegment(array)
+	return Segment(array)
+
+class SparseTable:
+	# static range minimum query ; the array can't be updated
+	def __init__(self, array):
+		leaves = list(array)
+		self.size = n = len(leaves)
+		levels = n.bit_length()
+		if np is not None:
+			leaves = np.asarray(leaves)
+			self.table = table = np.empty((levels, n), dtype=leaves.dtype)
+			table[0] = leaves
+			for k in range(1, levels):
+				half = 1 << (k - 1)
+				width = n - (1 << k) + 1 # number of blocks of length 2^k
+				np.minimum(table[k - 1, :width], table[k - 1, half:half + width], out=table[k, :width])
+			# lg[m] = floor(log2(m)) : lengths in [2^k, 2^(k+1)) get k
+			self.lg = np.concatenate(([0], np.repeat(np.arange(levels), 1 << np.arange(levels))))[:n + 1]
+		else:
+			self.table = table = [leaves]
+			for k in range(1, levels):
+				half = 1 << (k - 1)
+				prev = table[-1]
+				table.append([min(prev[i], prev[i + half]) for i in range(n - (1 << k) + 1)])
 
 	def query(self, i, j):
 		if not 0 <= i <= j < self.size:
 			return float('inf')
-		if i == j:
-			return self.array[i]
-		mid = (i + j) // 2
-		return min(self.query(i, mid), self.query(mid + 1, j))
-
-seg = Segment([3,1,2,5,4,2,3,6,-2,9])
-print(seg.array)
-print(seg.mintree)
-print("mininal value in array[1:7]", seg.query(1,6))
-print("*** update ***")
-seg.update(1, 3)
-print(seg.array)
-print(seg.mintree)
-print("mininal value in array[1:7]", seg.query(1,6))
-print("*** update ***")
-seg.update(5, -1)
-print(seg.array)
-print(seg.mintree)
-print("mininal value in array[1:7]", seg.query(1,6))
+		k = (j - i + 1).bit_length() - 1
+		row = self.table[k]
+		return min(row[i], row[j - (1 << k) + 1])
+
+	def query_many(self, i, j):
+		# i, j : sequences of valid inclusive bounds
+		if np is None:
+			return [self.query(a, b) for a, b in zip(i, j)]
+		i = np.asarray(i, dtype=np.int64)
+		j = np.asarray(j, dtype=np.int64)
+		k = self.lg[j - i + 1]
+		return np.minimum(self.table[k, i], self.table[k, j - (1 << k) + 1])
+
+
+# Benchmark
+import random
+import time
+
+def benchmark(n=10000, m=100):
+	# m random range adds followed by a range-min query each : point-update loop versus lazy propagation
+	array = [random.randint(0, 1000) for _ in range(n)]
+	ranges = [sorted(random.sample(range(n), 2)) for _ in range(m)]
+	seg = Segment(array)
+	start = time.perf_counter()
+	for i, j in ranges:
+		for k in range(i, j + 1):
+			seg.update(k, seg.tree[seg.size + k] + 1)
+		seg.query(i, j)
+	loop = time.perf_counter() - start
+	lazy = LazySegment(array)
+	start = time.perf_counter()
+	for i, j in ranges:
+		lazy.update_range(i, j, 1)
+		lazy.query(i, j)
+	print("point-update loop : %8.3f s, lazy : %8.3f s" % (loop, time.perf_counter() - start))
+
+def batch_benchmark(n=1000000, m=100000):
+	# m range minimum queries, one Python call each versus one batched call
+	array = [random.random() for _ in range(n)]
+	i = [random.randrange(n) for _ in range(m)]
+	j = [random.randrange(a, n) for a in i]
+	for name, build in (("Segment", Segment), ("vector_segment", vector_segment), ("SparseTable", SparseTable)):
+		start = time.perf_counter()
+		rmq = build(array)
+		built = time.perf_counter() - start
+		start = time.perf_counter()
+		for a, b in zip(i, j):
+			rmq.query(a, b)
+		single = time.perf_counter() - start
+		start = time.perf_counter()
+		rmq.query_many(i, j)
+		batch = time.perf_counter() - start
+		print("%-14s build : %7.3f s, one by one : %7.3f s, batched : %7.3f s" % (name, built, single, batch))
+
+if __name__ == "__main__":
+	seg = Segment([3,1,2,5,4,2,3,6,-2,9])
+	print(seg.array)
+	print(seg.tree)
+	print("mininal value in array[1:7]", seg.query(1,6))
+	print("*** update ***")
+	seg.update(1, 3)
+	print(seg.array)
+	print(seg.tree)
+	print("mininal value in array[1:7]", seg.query(1,6))
+	print("*** update ***")
+	seg.update(5, -1)
+	print(seg.array)
+	print(seg.tree)
+	print("mininal value in array[1:7]", seg.query(1,6))
+	print("*** sum ***")
+	seg = Segment([3,1,2,5,4,2,3,6,-2,9], operator.add, 0)
+	print("sum of array[1:7]", seg.query(1,6))
+	print("*** lazy range add ***")
+	lazy = LazySegment([3,1,2,5,4,2,3,6,-2,9])
+	lazy.update_range(0, 4, 10)
+	print("mininal value in array[1:7]", lazy.query(1,6))
+	benchmark()
+	batch_benchmark()
@@ -11,10 +11,17 @@
 5. Minimum : NOT IMPLEMENTED
 6. Successor : NOT IMPLEMENTED
 7. Predecessor : NOT IMPLEMENTED
+- Array implementation : nodes live in slots of a pool allocator (pool.Pool) with a typed next column,
+  deleted slots are reused and the capacity grows geometrically, so there is no hard cap
+- Indexed : a hash index key -> slot of the predecessor node makes Search(S, k) and Delete(S, x) O(1)
+  (the predecessor is what a singly linked list needs to unlink a node) ; keys must be unique
 """
+from pool import Pool
 
 # Universal Implementation (Naïve)
 class Node:
+	__slots__ = ("key", "val", "next")
+
 	def __init__(self, key=None, val=None):
 		self.key = key
 		self.val = val # satelite data
@@ -53,47 +60,79 @@ class SinglyLinkedList:
 
 # Array Inplementation
 class Node:
+	__slots__ = ("key", "val")
+
 	def __init__(self, key=None, val=None):
 		self.key = key
 		self.val = val # satelite data
 
 class SinglyLinkedList:
-	def __init__(self, maxsize):
+	# slots come from a Pool : next links in a typed array, freed slots reused, capacity doubling on demand
+	# indexed : keep a hash index key -> slot of the predecessor, so search and delete are O(1) ; keys must be unique
+	def __init__(self, capacity=16, indexed=False):
 		self.nil = Node()
-		self.freestack = list(range(2, 2 * maxsize + 2, 2)) # first two spaces belong to sentinel node
-		self.record = [None] * (2 * maxsize + 2) # each node takes 2 space ;  total # = maxsize + 1 (sentinel node)
-		self.record[0] = self.nil
-		self.record[1] = 0
+		self.pool = Pool(capacity)
+		self.pool.items[0] = self.nil # slot 0 belongs to sentinel node
 		self.head = 0
+		self.index = {} if indexed else None
+
+	def __len__(self):
+		return len(self.pool)
 
 	def insert(self, x):
-		try:
-			freeindex = self.freestack.pop()
-		except IndexError:
-			raise Exception("out of free space")
-		else:
-			self.record[freeindex] = x
-			self.record[freeindex + 1] = self.head
-			self.head = freeindex
-			self.record[1] = self.head
+		# return the slot index of x
+		if self.index is not None:
+			if x.key in self.index:
+				raise Exception("duplicate key")
+			self.index[x.key] = 0 # the head follows the sentinel
+		index = self.pool.alloc(x)
+		if self.index is not None and self.head:
+			self.index[self.pool.items[self.head].key] = index
+		self.pool.next[index] = self.head
+		self.head = index
+		self.pool.next[0] = self.head
+		return index
 
 	def delete(self, x):
 		# assume x is in S
-		prev = 0
-		curr = self.head
-		while self.record[curr] is not x:
-			prev = curr
-			curr = self.record[curr + 1]
-		self.freestack.append(curr) # push deleted index back to free stack
-		self.record[prev + 1] = self.record[curr + 1] # prev.next = curr.next
+		items, nxt = self.pool.items, self.pool.next
+		if self.index is not None:
+			prev = self.index.pop(x.key)
+			curr = nxt[prev]
+		else:
+			prev = 0
+			curr = self.head
+			while items[curr] is not x:
+				prev = curr
+				curr = nxt[curr]
+		nxt[prev] = nxt[curr] # prev.next = curr.next
+		if self.index is not None and nxt[curr]:
+			self.index[items[nxt[curr]].key] = prev
 		if curr == self.head:
-			self.head = self.record[curr + 1]
+			self.head = nxt[curr]
+		self.pool.release(curr) # push deleted index back to the free list
+
+	def delete_key(self, key):
+		self.delete(self.search(key))
 
 	def search(self, key):
-		index = self.head
-		while self.record[index].key != key:
-			if not index:
+		items, nxt = self.pool.items, self.pool.next
+		if self.index is not None:
+			if key not in self.index:
 				raise Exception("key not found")
-			else:
-				index = self.record[index + 1]
-		return self.record[index]
+			return items[nxt[self.index[key]]]
+		index = self.head
+		while index:
+			if items[index].key == key:
+				return items[index]
+			index = nxt[index]
+		raise Exception("key not found")
+
+	def compact(self):
+		# renumber the slots densely ; return the mapping from old to new slot indices
+		mapping = self.pool.compact()
+		self.head = mapping[self.head]
+		if self.index is not None:
+			for key, prev in self.index.items():
+				self.index[key] = mapping[prev]
+		return mapping
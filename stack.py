@@ -2,42 +2,180 @@
 """
 - Last In First Out (LIFO)
 - Basic Operation:
-1. Insert(S, x) : a.k.a. Push ; O(1)
+1. Insert(S, x) : a.k.a. Push ; amortized O(1)
 2. Delete(S) : a.k.a. Pop ; O(1)
 3. Search : NOT IMPLEMENTED
-4. Maximum : NOT IMPLEMENTED
-5. Minimum : NOT IMPLEMENTED
+4. Maximum : IMPLEMENTED IN MinMaxStack, O(1)
+5. Minimum : IMPLEMENTED IN MinMaxStack, O(1)
 6. Successor : NOT IMPLEMENTED
 7. Predecessor : NOT IMPLEMENTED
+
+- Batch Operation:
+1. PushMany(S, X) : O(k), copied as one slice
+2. PopMany(S, k) : O(k), copied as one slice
+
+- Growth
+# the array doubles its capacity when full, so a push is amortized O(1) ; maxsize (optional) bounds the size
+# ArrayStack stores numeric items in a typed array
+# MinMaxStack keeps two monotonic stacks beside the items : the running minima and maxima,
+  pushed only when a new extreme (or a tie) arrives, so minimum()/maximum() read their top
 """
 
-# Universal Implementation 
+# Universal Implementation
 class Stack:
-	def __init__(self, maxsize=float("inf")):
-		self.top = 0
+	def __init__(self, maxsize=None, capacity=16):
+		self.top = 0 # number of items ; array[top - 1] is the top item
 		self.max = maxsize
-		self.array = [None] * maxsize
+		self.array = self.allocate(capacity)
 
-	def push(self, x):
-		if self.top  < self.max - 1:
-			self.array[self.top] = x
-			self.top += 1
-		else:
+	def allocate(self, capacity):
+		return [None] * capacity
+
+	def __len__(self):
+		return self.top
+
+	def reserve(self, k):
+		# make room for k more items
+		if self.max is not None and self.top + k > self.max:
 			raise Exception("stack overflow")
+		capacity = len(self.array)
+		if self.top + k <= capacity:
+			return
+		while capacity < self.top + k:
+			capacity = max(1, 2 * capacity)
+		array = self.allocate(capacity)
+		array[:self.top] = self.array[:self.top]
+		self.array = array
+
+	def push(self, x):
+		if self.top == len(self.array) or self.max is not None:
+			self.reserve(1)
+		self.array[self.top] = x
+		self.top += 1
+
+	def push_many(self, xs):
+		xs = self.convert(xs)
+		self.reserve(len(xs))
+		self.array[self.top:self.top + len(xs)] = xs
+		self.top += len(xs)
+
+	def convert(self, xs):
+		return list(xs)
 
 	def pop(self):
 		if self.top > 0:
-			x = self.array[self.top]
 			self.top -= 1
+			x = self.array[self.top]
+			self.array[self.top] = None # drop the reference held by the array
 			return x
 		else:
 			raise Exception("stack underflow")
 
+	def pop_many(self, k):
+		# pop k items, returned in pop order (the top first)
+		if k > self.top:
+			raise Exception("stack underflow")
+		xs = self.array[self.top - k:self.top]
+		self.array[self.top - k:self.top] = [None] * k
+		self.top -= k
+		xs.reverse()
+		return xs
+
+	def peek(self):
+		if self.top > 0:
+			return self.array[self.top - 1]
+		raise Exception("stack underflow")
+
+# Typed Array Implementation
+from array import array as typedarray # the stacks above keep their items in an attribute named array
+
+class ArrayStack(Stack):
+	def __init__(self, maxsize=None, capacity=16, typecode="d"):
+		self.typecode = typecode
+		super().__init__(maxsize, capacity)
+
+	def allocate(self, capacity):
+		return typedarray(self.typecode, bytes(capacity * typedarray(self.typecode).itemsize))
+
+	def convert(self, xs):
+		if isinstance(xs, typedarray) and xs.typecode == self.typecode:
+			return xs
+		return typedarray(self.typecode, xs)
+
+	def pop(self):
+		if self.top > 0:
+			self.top -= 1
+			return self.array[self.top]
+		else:
+			raise Exception("stack underflow")
+
+	def pop_many(self, k):
+		# pop k items as a typed array, in pop order (the top first)
+		if k > self.top:
+			raise Exception("stack underflow")
+		xs = self.array[self.top - k:self.top]
+		self.top -= k
+		xs.reverse()
+		return xs
+
+# Min-Max Implementation
+class MinMaxStack(Stack):
+	def __init__(self, maxsize=None, capacity=16):
+		super().__init__(maxsize, capacity)
+		self.mins = [] # non-increasing from bottom to top
+		self.maxs = [] # non-decreasing from bottom to top
+
+	def push(self, x):
+		super().push(x)
+		if not self.mins or not self.mins[-1] < x:
+			self.mins.append(x)
+		if not self.maxs or not x < self.maxs[-1]:
+			self.maxs.append(x)
+
+	def push_many(self, xs):
+		xs = self.convert(xs)
+		super().push_many(xs)
+		mins, maxs = self.mins, self.maxs
+		for x in xs:
+			if not mins or not mins[-1] < x:
+				mins.append(x)
+			if not maxs or not x < maxs[-1]:
+				maxs.append(x)
+
+	def pop(self):
+		x = super().pop()
+		if x == self.mins[-1]:
+			self.mins.pop()
+		if x == self.maxs[-1]:
+			self.maxs.pop()
+		return x
+
+	def pop_many(self, k):
+		xs = super().pop_many(k)
+		mins, maxs = self.mins, self.maxs
+		for x in xs:
+			if x == mins[-1]:
+				mins.pop()
+			if x == maxs[-1]:
+				maxs.pop()
+		return xs
+
+	def minimum(self):
+		if not self.top:
+			raise Exception("stack underflow")
+		return self.mins[-1]
+
+	def maximum(self):
+		if not self.top:
+			raise Exception("stack underflow")
+		return self.maxs[-1]
+
 
-# Python built-in Implementation : list
-stack = [] # maxsize = float("inf")
-stack.append(3) # push element 3
-stack.append("hey") # push element 4
-x = stack.pop() # x = "hey"
-y = stack.pop() # y = 3
-stack.pop() # stack empty : raise IndexError
\ No newline at end of file
+if __name__ == "__main__":
+	# Python built-in Implementation : list
+	stack = [] # maxsize = float("inf")
+	stack.append(3) # push element 3
+	stack.append("hey") # push element 4
+	x = stack.pop() # x = "hey"
+	y = stack.pop() # y = 3
+	# stack.pop() # stack empty : raise IndexError
@@ -10,6 +10,8 @@
 6. x.children can be implemented with hash table or singly linked list.
 -- Hash table :  x.children = {'a': node1, 'b': node2, 'c': EOF}
 -- Singly linked list : (char, child, next_sibling)   
+-- Radix (path-compressed) : x.children = {'c': node1} where node1.label = 'cat', one node per branching point
+-- Double array (static) : the children of state s are the cells BASE[s] + code(char) whose CHECK is s
 7. Comparison between trie and hash table (TODO)
 
 - Basic Operation
@@ -25,10 +27,107 @@
 -----> 2. p < q and ai = bi for i = 0, 1, ..., p
 1. sort(S, x) : return all strings in the dictionary containing the prefix x with lexicographic order.
    Only implemented in the one with singly linked list, not hash table.
+2. fuzzy(S, x, k) : lazily yield (string, distance) for the strings within Levenshtein distance k of x, in lexicographic order.
+   The DP row of x against the path string is extended by one row per char on the way down (O(m) per node),
+   and a subtree is pruned as soon as the row minimum exceeds k, so only the nodes near x are visited.
+3. wildcard(S, p) : lazily yield the strings matching the pattern p in lexicographic order,
+   where '?' matches any one char and '*' any (possibly empty) sequence.
+   The set of pattern positions reachable by the path string is carried down (O(|p|) per node) ; an empty set prunes.
+   Both walk the trie through the edges/ends methods of each implementation (TrieSearch).
 """
 
+import bisect
+import gc
 import heapq
+import mmap
+import os
+import struct
+from array import array
 from collections import defaultdict
+from contextlib import contextmanager
+
+@contextmanager
+def paused_gc():
+	# bulk loads allocate millions of nodes, which keep triggering full cyclic collections over the growing trie ;
+	# trie nodes form no reference cycles, so the collector is paused for the duration
+	enabled = gc.isenabled()
+	gc.disable()
+	try:
+		yield
+	finally:
+		if enabled:
+			gc.enable()
+
+def common(a, b):
+	# length of the common prefix of a and b
+	i = 0
+	n = min(len(a), len(b))
+	while i < n and a[i] == b[i]:
+		i += 1
+	return i
+
+class TrieSearch:
+	# fuzzy and wildcard search over any trie implementing
+	# root, edges(node) : yield (label, child) in lexicographic order, ends(node) : True if a string ends at node
+
+	def fuzzy(self, word, k):
+		m = len(word)
+		stack = [(self.root, "", list(range(m + 1)))] # row[j] : edit distance between word[:j] and the path string
+		while stack:
+			node, s, row = stack.pop()
+			if self.ends(node) and row[m] <= k:
+				yield s, row[m]
+			branches = []
+			for label, child in self.edges(node):
+				r = row
+				for char in label:
+					prev = r
+					r = [prev[0] + 1]
+					for j in range(1, m + 1):
+						r.append(min(r[j - 1] + 1, prev[j] + 1, prev[j - 1] + (word[j - 1] != char)))
+					if min(r) > k:
+						break
+				else:
+					branches.append((child, s + label, r))
+			branches.reverse() # the stack pops the smallest label first
+			stack.extend(branches)
+
+	def wildcard(self, pattern):
+		n = len(pattern)
+
+		def closure(positions):
+			# a '*' may match the empty sequence
+			result = set()
+			for i in positions:
+				result.add(i)
+				while i < n and pattern[i] == "*":
+					i += 1
+					result.add(i)
+			return result
+
+		stack = [(self.root, "", closure([0]))]
+		while stack:
+			node, s, positions = stack.pop()
+			if n in positions and self.ends(node):
+				yield s
+			branches = []
+			for label, child in self.edges(node):
+				reached = positions
+				for char in label:
+					step = set()
+					for i in reached:
+						if i < n:
+							if pattern[i] == "*":
+								step.add(i)
+							elif pattern[i] == "?" or pattern[i] == char:
+								step.add(i + 1)
+					reached = closure(step)
+					if not reached:
+						break
+				else:
+					branches.append((child, s + label, reached))
+			branches.reverse()
+			stack.extend(branches)
 
 # I1 - Singly linked list implementation
 # worst case time complexity
@@ -38,9 +137,13 @@ from collections import defaultdict
 # sort : O(N*|t|), where N is total number of matching strings, |t| is the maximal length of the remaining suffix
 # worst case occurs when the substrings after prefix of all N matching strings are pairwise different among d-length prefix
 # where d = log(N) // log(|c|)
+# insert_many / delete_many : O(Blog(B)) comparisons for the sort, then only the chars past the common prefix
+# of consecutive strings are walked, instead of a search plus an insert from the root per string (B : batch size)
 
 
 class Node1:
+	__slots__ = ("key", "val", "next", "child", "ref")
+
 	def __init__(self, key=None, val=None):
 		self.key = key
 		self.val = val
@@ -48,7 +151,7 @@ class Node1:
 		self.child = None # pointer to the first child
 		self.ref = 0
 
-class Trie1:
+class Trie1(TrieSearch):
 	def __init__(self):
 		self.root = Node1()
 
@@ -112,7 +215,112 @@ class Trie1:
 					prev = nxt
 					nxt = nxt.next
 		curr.child = curr.child.next
-		
+
+	def child(self, curr, char, start=None):
+		# return the child of curr keyed by char, linking a new one in sibling order if absent
+		# start : a child of curr with a smaller key, to resume the sibling scan from
+		if start is None:
+			if not curr.child or char < curr.child.key:
+				node = Node1(char)
+				node.next = curr.child
+				curr.child = node
+				return node
+			start = curr.child
+		while True:
+			if start.key == char:
+				return start
+			elif not start.next or start.next.key > char:
+				node = Node1(char)
+				node.next = start.next
+				start.next = node
+				return node
+			start = start.next
+
+	def unlink(self, curr, node):
+		# remove node from the children of curr
+		if curr.child is node:
+			curr.child = node.next
+			return
+		prev = curr.child
+		while prev.next is not node:
+			prev = prev.next
+		prev.next = node.next
+
+	def insert_many(self, strings):
+		# sort once, then descend only below the common prefix of consecutive strings ;
+		# at the first differing char the sibling scan resumes from the child taken by the previous string
+		with paused_gc():
+			path = [self.root] # path[i] : node of prev[:i]
+			prev = ''
+			for s in sorted(set(strings)):
+				d = common(prev, s)
+				start = path[d + 1] if d + 1 < len(path) else None
+				del path[d + 1:]
+				curr = path[-1]
+				for char in s[d:]:
+					curr = self.child(curr, char, start)
+					start = None
+					path.append(curr)
+				prev = s
+				if curr.child and curr.child.key == '':
+					continue # already in the trie, so no node was created
+				for node in path:
+					node.ref += 1
+				null_c = Node1("")
+				null_c.next = curr.child
+				curr.child = null_c
+
+	def delete_many(self, strings):
+		strings = sorted(set(strings))
+		# check every string first, so that a missing one leaves the trie untouched
+		path = [self.root]
+		prev = ''
+		for s in strings:
+			d = common(prev, s)
+			start = path[d + 1] if d + 1 < len(path) else None
+			del path[d + 1:]
+			curr = path[-1]
+			for char in s[d:]:
+				nxt = start or curr.child
+				start = None
+				while nxt and nxt.key < char:
+					nxt = nxt.next
+				if not nxt or nxt.key != char:
+					raise ValueError("string '%s' is not in the trie" % s)
+				curr = nxt
+				path.append(curr)
+			prev = s
+			if not (curr.child and curr.child.key == ''):
+				raise ValueError("string '%s' is not in the trie" % s)
+		path = [self.root]
+		prev = ''
+		for s in strings:
+			d = common(prev, s)
+			del path[d + 1:]
+			curr = path[-1]
+			for char in s[d:]:
+				curr = curr.child
+				while curr.key != char:
+					curr = curr.next
+				path.append(curr)
+			prev = s
+			for i, node in enumerate(path):
+				node.ref -= 1
+				if node.ref == 0 and i:
+					self.unlink(path[i - 1], node) # no other string passes through node
+					del path[i:]
+					break
+			else:
+				curr.child = curr.child.next
+
+	@classmethod
+	def load(cls, path):
+		# build from a word file, one string per line (blank lines skipped) ; a sorted file makes the batch sort linear
+		trie = cls()
+		with open(path, encoding="utf-8") as f:
+			trie.insert_many(word for word in f.read().splitlines() if word)
+		return trie
+
 	def prefix_search(self, prefix):
 		curr = self.root
 		for char in prefix:
@@ -127,7 +335,7 @@ class Trie1:
 
 	def search(self, s):
 		curr = self.prefix_search(s)
-		if curr and curr.child.key == '':
+		if curr and curr.child and curr.child.key == '':
 			return curr
 
 	def sort(self, s):
@@ -151,57 +359,233 @@ class Trie1:
 			preorder(node, s)
 		return strings
 
+	def edges(self, node):
+		child = node.child
+		while child:
+			if child.key != '':
+				yield child.key, child
+			child = child.next
+
+	def ends(self, node):
+		return node.child is not None and node.child.key == ''
+
+	def freeze(self):
+		# compile into a static DoubleArrayTrie
+		return DoubleArrayTrie(self.sort(''))
+
 # I2 - Hash heap Implementation
 # worst case time complexity
-# insert : O(m*log|c|)
-# delete : O(m + log|c|)
+# insert : O(m*log|c|) ; O(m*(log|c| + k)) with the top-k cache
+# delete : O(m + log|c|) ; O(m*(|c| + k)*log(k)) with the top-k cache
 # search : O(m)
 # sort : O(N*(|t| + log|c|)), where N is total number of matching strings, |t| is the maximal length of the remaining suffix
 # worst case occurs when the substrings after prefix of all N matching strings are pairwise different among d-length prefix
 # where d = log(N) // log(|c|)
+# insert_many / delete_many : sort once, then only the chars past the common prefix of consecutive strings are walked ;
+# delete_many rebuilds the top-k caches once for the whole batch
+# iterprefix : lazy sort without touching the heaps, O(|t|*|c|log|c|) per string yielded
+# complete : O(m + k) with the top-k cache ; each node keeps the k heaviest strings of its subtree, sorted by (-weight, string)
+# -- insert pushes the new entry into the caches along its path ; delete and reweighting rebuild them bottom-up
+#    from the children's caches, since the best k of a subtree are among the best k of its children
 class Node2:
-	def __init__(self, val=None):
+	__slots__ = ("children", "keys", "waited", "val", "ref", "entry", "top")
+
+	def __init__(self, val=None, k=0):
 		self.children = {} # hash table
 		self.keys = [] # heap
-		self.waited = defaultdict(int) # for lazy key deletion
+		self.waited = None # for lazy key deletion, allocated on the first deletion under this node
 		self.val = val
 		self.ref = 0
+		self.entry = None # (-weight, string) if a string ends here
+		self.top = [] if k else None # cached best k entries of the subtree, ascending
 
-class Trie2:
-	def __init__(self):
-		self.root = Node2()
+class Trie2(TrieSearch):
+	def __init__(self, k=0):
+		# k : size of the per-node top-k cache for complete() ; 0 disables it
+		self.k = k
+		self.root = Node2(k=k)
 
-	def insert(self, s):
-		if self.search(s):
-			return 
+	def insert(self, s, weight=None):
+		# weight : None keeps the weight of a string already in the trie, and gives 0 to a new one
+		node = self.search(s)
+		if node:
+			if weight is not None and node.entry[0] != -weight:
+				self.reweight(s, weight)
+			return
+		k = self.k
+		entry = (-(weight or 0), s)
 		curr = self.root
 		curr.ref += 1
+		path = [curr]
 		for char in s:
 			if char not in curr.children:
 				heapq.heappush(curr.keys, char)
-				curr.children[char] = Node2()
+				curr.children[char] = Node2(k=k)
 			curr = curr.children[char]
 			curr.ref += 1
+			path.append(curr)
 		heapq.heappush(curr.keys, '') # Here '' represents null character
 		curr.children[''] = len(s)
+		curr.entry = entry
+		self.promote(path, entry)
+
+	def promote(self, path, entry):
+		# offer a new entry to the caches along its path
+		k = self.k
+		if k:
+			for node in path:
+				top = node.top
+				if len(top) < k or entry < top[-1]:
+					bisect.insort(top, entry)
+					if len(top) > k:
+						top.pop()
+
+	def reweight(self, s, weight):
+		path = [self.root]
+		for char in s:
+			path.append(path[-1].children[char])
+		path[-1].entry = (-weight, s)
+		self.refresh(path)
+
+	def refresh(self, path):
+		# rebuild the caches of path (root first) bottom-up
+		if not self.k:
+			return
+		for node in reversed(path):
+			candidates = [entry for char, child in node.children.items() if char != '' for entry in child.top]
+			if '' in node.children:
+				candidates.append(node.entry)
+			node.top = heapq.nsmallest(self.k, candidates)
 	
 	def delete(self, s):
 		if not self.search(s):
 			raise ValueError("string '%s' is not in the trie" % s)
 		curr = self.root
 		curr.ref -= 1
+		path = [curr]
 		for char in s:
 			nxt = curr.children[char]
 			nxt.ref -= 1
 			if nxt.ref == 0:
+				if curr.waited is None:
+					curr.waited = defaultdict(int)
 				curr.waited[char] += 1
 				del curr.children[char]
+				self.refresh(path)
 				return
 			else:
 				curr = nxt
+				path.append(curr)
 		heapq.heappop(curr.keys)
 		del curr.children['']
+		curr.entry = None
+		self.refresh(path)
 	
+	def insert_many(self, strings, weights=None):
+		# sort once, then descend only below the common prefix of consecutive strings
+		# weights : iterable parallel to strings ; for a repeated string the last weight wins
+		# a weight of None (or no weights) keeps the weight of a string already in the trie, and gives 0 to a new one
+		with paused_gc():
+			k = self.k
+			if weights is not None:
+				strings = list(strings)
+				weights = list(weights)
+				if len(strings) != len(weights):
+					raise ValueError("strings and weights differ in length")
+				items = dict(zip(strings, weights))
+			else:
+				items = dict.fromkeys(strings)
+			path = [self.root] # path[i] : node of prev[:i]
+			prev = ''
+			for s in sorted(items):
+				d = common(prev, s)
+				del path[d + 1:]
+				curr = path[-1]
+				for char in s[d:]:
+					if char not in curr.children:
+						heapq.heappush(curr.keys, char)
+						curr.children[char] = Node2(k=k)
+					curr = curr.children[char]
+					path.append(curr)
+				prev = s
+				weight = items[s]
+				if '' in curr.children:
+					if weight is not None and curr.entry[0] != -weight:
+						curr.entry = (-weight, s)
+						self.refresh(path)
+					continue
+				entry = (-(weight or 0), s)
+				for node in path:
+					node.ref += 1
+				heapq.heappush(curr.keys, '')
+				curr.children[''] = len(s)
+				curr.entry = entry
+				self.promote(path, entry)
+
+	def delete_many(self, strings):
+		strings = sorted(set(strings))
+		# check every string first, so that a missing one leaves the trie untouched
+		path = [self.root]
+		prev = ''
+		for s in strings:
+			d = common(prev, s)
+			del path[d + 1:]
+			curr = path[-1]
+			for char in s[d:]:
+				curr = curr.children.get(char)
+				if curr is None:
+					raise ValueError("string '%s' is not in the trie" % s)
+				path.append(curr)
+			prev = s
+			if '' not in curr.children:
+				raise ValueError("string '%s' is not in the trie" % s)
+		path = [self.root]
+		prev = ''
+		touched = {} # nodes whose cache must be rebuilt : id -> (depth, node)
+		for s in strings:
+			d = common(prev, s)
+			del path[d + 1:]
+			curr = path[-1]
+			for char in s[d:]:
+				curr = curr.children[char]
+				path.append(curr)
+			prev = s
+			for i, node in enumerate(path):
+				node.ref -= 1
+				if node.ref == 0 and i:
+					parent = path[i - 1] # no other string passes through node
+					if parent.waited is None:
+						parent.waited = defaultdict(int)
+					parent.waited[s[i - 1]] += 1
+					del parent.children[s[i - 1]]
+					del path[i:]
+					break
+			else:
+				heapq.heappop(curr.keys)
+				del curr.children['']
+				curr.entry = None
+			if self.k:
+				for depth, node in enumerate(path):
+					touched[id(node)] = (depth, node)
+		# one bottom-up rebuild for the whole batch
+		self.refresh([node for depth, node in sorted(touched.values(), key=lambda item: item[0])])
+
+	@classmethod
+	def load(cls, path, k=0):
+		# build from a word file, one string per line as "string" or "string<TAB>weight" (blank lines skipped) ;
+		# a sorted file makes the batch sort linear
+		strings = []
+		weights = []
+		with open(path, encoding="utf-8") as f:
+			for line in f.read().splitlines():
+				if line:
+					s, tab, weight = line.partition("\t")
+					strings.append(s)
+					weights.append(float(weight) if tab else None)
+		trie = cls(k)
+		trie.insert_many(strings, weights)
+		return trie
+
 	def prefix_search(self, prefix):
 		curr = self.root
 		for char in prefix:
@@ -228,7 +612,7 @@ class Trie2:
 			valid_keys = []
 			while node.keys:
 				char = heapq.heappop(node.keys)
-				if node.waited[char] > 0:
+				if node.waited and node.waited[char] > 0:
 					node.waited[char] -= 1
 					continue
 				elif char == '':
@@ -242,43 +626,583 @@ class Trie2:
 			preorder(node, s)
 		return strings
 
+	def walk(self, prefix):
+		# yield (string, node) for the strings with prefix in lexicographic order, the node being where the string ends
+		node = self.prefix_search(prefix)
+		if not node:
+			return
+		stack = [(node, prefix)]
+		while stack:
+			node, s = stack.pop()
+			children = node.children
+			if '' in children:
+				yield s, node
+			for char in sorted(children, reverse=True):
+				if char != '':
+					stack.append((children[char], s + char))
+
+	def iterprefix(self, prefix='', limit=None):
+		# lazily yield at most limit strings with prefix in lexicographic order ; the trie is left untouched
+		if limit is not None and limit <= 0:
+			return
+		for count, (s, node) in enumerate(self.walk(prefix), 1):
+			yield s
+			if count == limit:
+				return
+
+	def complete(self, prefix, k=None):
+		# return the k heaviest strings with prefix, heaviest first, ties in lexicographic order
+		k = self.k if k is None else k
+		node = self.prefix_search(prefix)
+		if not node or k <= 0:
+			return []
+		if k <= self.k:
+			return [s for weight, s in node.top[:k]]
+		# no cache large enough : scan the subtree
+		return [s for weight, s in heapq.nsmallest(k, (node.entry for s, node in self.walk(prefix)))]
+
+	def edges(self, node):
+		children = node.children
+		for char in sorted(children):
+			if char != '':
+				yield char, children[char]
+
+	def ends(self, node):
+		return '' in node.children
+
+	def freeze(self):
+		# compile into a static DoubleArrayTrie
+		return DoubleArrayTrie(self.iterprefix())
+
+# I3 - Radix (Patricia) trie : path-compressed hash implementation
+# every chain of single-child nodes is merged into one edge, so a node has either >= 2 children or marks a string end ;
+# x.label is the string slice on the edge into x, and x.children maps the first char of each edge label to the child
+# N strings take at most 2N nodes whatever their length, and a lookup hops once per edge instead of once per char
+# worst case time complexity
+# insert : O(m) ; may split one edge into two
+# delete : O(m) ; may merge a node with its only child
+# search : O(m) ; the edge labels are compared with str.startswith, without slicing s
+# sort : O(N*(|t| + |c|log|c|)), children are sorted on the fly
+class Node3:
+	__slots__ = ("label", "children", "end", "val")
+
+	def __init__(self, label="", end=False, val=None):
+		self.label = label # edge label from the parent
+		self.children = {} # first char of the edge label -> child
+		self.end = end # True if the path from the root to this node spells a string in the trie
+		self.val = val
+
+class Trie3(TrieSearch):
+	def __init__(self):
+		self.root = Node3()
+
+	def insert(self, s):
+		curr = self.root
+		i = 0
+		n = len(s)
+		while i < n:
+			child = curr.children.get(s[i])
+			if child is None:
+				curr.children[s[i]] = Node3(s[i:], True)
+				return
+			label = child.label
+			if s.startswith(label, i):
+				curr = child
+				i += len(label)
+				continue
+			# split the edge at the end of the common prefix
+			k = 1
+			while i + k < n and label[k] == s[i + k]:
+				k += 1
+			mid = Node3(label[:k])
+			child.label = label[k:]
+			mid.children[child.label[0]] = child
+			curr.children[s[i]] = mid
+			if i + k == n:
+				mid.end = True
+			else:
+				mid.children[s[i + k]] = Node3(s[i + k:], True)
+			return
+		curr.end = True
+
+	def delete(self, s):
+		path = [] # (parent, node) on the way down
+		curr = self.root
+		i = 0
+		n = len(s)
+		while i < n:
+			child = curr.children.get(s[i])
+			if child is None or not s.startswith(child.label, i):
+				break
+			path.append((curr, child))
+			curr = child
+			i += len(child.label)
+		if i < n or not curr.end:
+			raise ValueError("string '%s' is not in the trie" % s)
+		curr.end = False
+		if not path:
+			return # s == '' : the root keeps its children
+		parent, node = path[-1]
+		if not node.children:
+			del parent.children[node.label[0]]
+			if len(path) > 1 and not parent.end and len(parent.children) == 1:
+				self.merge(parent)
+		elif len(node.children) == 1:
+			self.merge(node)
+
+	def merge(self, node):
+		# absorb the only child of a non-end node into the node's edge
+		(child,) = node.children.values()
+		node.label += child.label
+		node.children = child.children
+		node.end = child.end
+		node.val = child.val
+
+	def locate(self, prefix):
+		# return (node, path) for the highest node whose path from the root starts with prefix, or (None, None)
+		curr = self.root
+		path = ""
+		i = 0
+		n = len(prefix)
+		while i < n:
+			child = curr.children.get(prefix[i])
+			if child is None:
+				return None, None
+			label = child.label
+			if prefix.startswith(label, i):
+				i += len(label)
+			elif label.startswith(prefix[i:]):
+				i = n # prefix ends inside the edge
+			else:
+				return None, None
+			path += label
+			curr = child
+		return curr, path
+
+	def prefix_search(self, prefix):
+		return self.locate(prefix)[0]
+
+	def search(self, s):
+		curr = self.root
+		i = 0
+		n = len(s)
+		while i < n:
+			curr = curr.children.get(s[i])
+			if curr is None or not s.startswith(curr.label, i):
+				return
+			i += len(curr.label)
+		if curr.end:
+			return curr
+
+	def sort(self, s):
+		strings = []
+		node, path = self.locate(s)
+
+		def preorder(node, prefix):
+			if node.end:
+				strings.append(prefix)
+			children = node.children
+			for char in sorted(children):
+				child = children[char]
+				preorder(child, prefix + child.label)
+
+		if node:
+			preorder(node, path)
+		return strings
+
+	def edges(self, node):
+		children = node.children
+		for char in sorted(children):
+			child = children[char]
+			yield child.label, child
+
+	def ends(self, node):
+		return node.end
+
+	def freeze(self):
+		# compile into a static DoubleArrayTrie
+		return DoubleArrayTrie(self.sort(''))
+
+
+# I4 - Double-array trie : static, compiled from a set of strings (or from Trie1/Trie2/Trie3 by freeze())
+# the chars are numbered 1..|c| in sorted order, code 0 being the end of a string ;
+# the states are cells of two int32 arrays, the root being cell 0, and the edge from state s on code c goes to
+# -- t = BASE[s] + c, which is valid iff CHECK[t] == s
+# the end cell of a string (code 0) stores in BASE the rank of the string, so rank() doubles as a perfect hash ;
+# every base is chosen first-fit, so that the cells of the children of a state do not collide with taken cells
+# worst case time complexity
+# build : O(total length * |c|) in the first-fit search, usually close to linear
+# search : O(m), one dict lookup and two array reads per char
+# sort : O(N*|t|*|c|), every code of a state is probed
+# the arrays can be saved to a file, which load() maps read-only : any number of processes share its pages
+class DoubleArrayTrie(TrieSearch):
+	MAGIC = b"DSADAT01"
+	root = 0 # the root state
+	HEADER = struct.Struct("<8sQQQ") # magic, number of cells, number of strings, alphabet size in bytes
+
+	def __init__(self, strings=()):
+		self.file = None
+		self.mm = None
+		self.build(sorted(set(strings)))
+
+	def build(self, strings):
+		self.size = len(strings)
+		self.alphabet = "".join(sorted(set().union(*strings)))
+		self.codes = codes = {char: code for code, char in enumerate(self.alphabet, 1)}
+		base = array("i", [0])
+		check = array("i", [-1])
+		free = 1 # every cell below free (but the root) is taken
+		top = 0 # largest base of a state
+		stack = [(0, 0, len(strings), 0)] if strings else [] # state, strings[lo:hi] share the prefix of the state, which has length depth
+		while stack:
+			state, lo, hi, depth = stack.pop()
+			# group the strings by their char at depth ; a string of length depth ends here (code 0, sorted first)
+			labels = []
+			ranges = []
+			i = lo
+			if len(strings[i]) == depth:
+				labels.append(0)
+				ranges.append((i, i + 1))
+				i += 1
+			while i < hi:
+				code = codes[strings[i][depth]]
+				j = i + 1
+				while j < hi and codes[strings[j][depth]] == code:
+					j += 1
+				labels.append(code)
+				ranges.append((i, j))
+				i = j
+			# first fit
+			while free < len(check) and check[free] != -1:
+				free += 1
+			b = max(1, free - labels[0])
+			while True:
+				if b + labels[-1] >= len(check):
+					grow = max(len(check), b + labels[-1] + 1 - len(check))
+					base.extend(array("i", bytes(4 * grow)))
+					check.extend(array("i", [-1]) * grow)
+				if all(check[b + code] == -1 for code in labels):
+					break
+				b += 1
+			base[state] = b
+			top = max(top, b)
+			for code in labels:
+				check[b + code] = state
+			for code, (i, j) in zip(labels, ranges):
+				if code:
+					stack.append((b + code, i, j, depth + 1))
+				else:
+					base[b] = i # rank of the string
+		n = len(check)
+		while n > 1 and check[n - 1] == -1:
+			n -= 1
+		n = max(n, top + len(self.alphabet) + 1)
+		if n > len(check):
+			base.extend(array("i", bytes(4 * (n - len(check)))))
+			check.extend(array("i", [-1]) * (n - len(check)))
+		self.base = base[:n]
+		self.check = check[:n]
+
+	def __len__(self):
+		return self.size
+
+	def __contains__(self, s):
+		return self.search(s) is not None
+
+	def prefix_search(self, prefix):
+		# return the state of prefix, or None
+		base, check = self.base, self.check
+		state = 0
+		for code in map(self.codes.get, prefix):
+			if code is None:
+				return
+			t = base[state] + code # in range : the arrays are padded past the largest base by |c| cells
+			if check[t] != state:
+				return
+			state = t
+		return state
+
+	def search(self, s):
+		# return the end cell of s (never 0, so always truthy), or None
+		state = self.prefix_search(s)
+		if state is not None:
+			t = self.base[state]
+			if self.check[t] == state:
+				return t
+
+	def rank(self, s):
+		# return the rank of s among the strings in sorted order, or None
+		t = self.search(s)
+		if t is not None:
+			return self.base[t]
+
+	def iterprefix(self, prefix='', limit=None):
+		# lazily yield at most limit strings with prefix in lexicographic order
+		state = self.prefix_search(prefix)
+		if state is None or (limit is not None and limit <= 0):
+			return
+		base, check, alphabet = self.base, self.check, self.alphabet
+		count = 0
+		stack = [(state, prefix)]
+		while stack:
+			state, s = stack.pop()
+			b = base[state]
+			if check[b] == state:
+				yield s
+				count += 1
+				if count == limit:
+					return
+			for code in range(len(alphabet), 0, -1):
+				t = b + code
+				if check[t] == state:
+					stack.append((t, s + alphabet[code - 1]))
+
+	def sort(self, s):
+		return list(self.iterprefix(s))
+
+	def edges(self, state):
+		base, check, alphabet = self.base, self.check, self.alphabet
+		b = base[state]
+		for code in range(1, len(alphabet) + 1):
+			if check[b + code] == state:
+				yield alphabet[code - 1], b + code
+
+	def ends(self, state):
+		return self.check[self.base[state]] == state
+
+	def save(self, path):
+		# write to a temporary file, then atomically replace path with it
+		alphabet = self.alphabet.encode("utf-8")
+		temp = path + ".tmp"
+		with open(temp, "wb") as f:
+			f.write(self.HEADER.pack(self.MAGIC, len(self.check), self.size, len(alphabet)))
+			f.write(alphabet.ljust(-(-len(alphabet) // 4) * 4, b"\0")) # keep the arrays 4-byte aligned
+			f.write(self.base.tobytes())
+			f.write(self.check.tobytes())
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(temp, path)
+
+	@classmethod
+	def load(cls, path):
+		# map the file read-only ; base and check are zero-copy views of the mapping
+		self = cls.__new__(cls)
+		self.file = open(path, "rb")
+		self.mm = None
+		if os.fstat(self.file.fileno()).st_size:
+			self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+		if self.mm is None or len(self.mm) < cls.HEADER.size or cls.HEADER.unpack_from(self.mm, 0)[0] != cls.MAGIC:
+			self.close()
+			raise Exception("not a double-array trie file")
+		magic, n, self.size, nbytes = cls.HEADER.unpack_from(self.mm, 0)
+		start = cls.HEADER.size
+		self.alphabet = self.mm[start:start + nbytes].decode("utf-8")
+		self.codes = {char: code for code, char in enumerate(self.alphabet, 1)}
+		start += -(-nbytes // 4) * 4
+		view = memoryview(self.mm)
+		self.base = view[start:start + 4 * n].cast("i")
+		self.check = view[start + 4 * n:start + 8 * n].cast("i")
+		view.release()
+		return self
+
+	def close(self):
+		# views must be released before the mapping can be closed
+		if self.mm is not None:
+			for view in ("base", "check"):
+				if getattr(self, view, None) is not None:
+					getattr(self, view).release()
+					setattr(self, view, None)
+			self.mm.close()
+			self.mm = None
+		if self.file is not None:
+			self.file.close()
+			self.file = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+
+# Benchmark
+import random
+import tempfile
+import time
+import tracemalloc
+
+def corpus(n, seed=0):
+	# URL-like strings : a few hosts and directories shared by many keys, then a random tail
+	rng = random.Random(seed)
+	letters = "abcdefghijklmnopqrstuvwxyz"
+	hosts = ["https://www.%s.com/" % "".join(rng.choices(letters, k=8)) for _ in range(20)]
+	dirs = ["%s/%s/" % ("".join(rng.choices(letters, k=6)), "".join(rng.choices(letters, k=5))) for _ in range(200)]
+	return ["%s%s%s" % (rng.choice(hosts), rng.choice(dirs), "".join(rng.choices(letters, k=rng.randint(4, 12)))) for _ in range(n)]
+
+def benchmark(n=1000000, m=100000):
+	words = corpus(n)
+	probes = random.sample(words, min(m, n))
+	for cls in (Trie1, Trie2, Trie3):
+		tracemalloc.start()
+		start = time.perf_counter()
+		trie = cls()
+		for word in words:
+			trie.insert(word)
+		build = time.perf_counter() - start
+		memory = tracemalloc.get_traced_memory()[0]
+		tracemalloc.stop()
+		start = time.perf_counter()
+		for word in probes:
+			trie.search(word)
+		search = time.perf_counter() - start
+		print("%s : build %7.2f s, %8.1f MB, search %6.2f us" % (cls.__name__, build, memory / 2**20, search / len(probes) * 1e6))
+		del trie
+
+def complete_benchmark(n=200000, m=1000, k=10):
+	# keystroke-level autocomplete on short prefixes : full sort versus the lazy generator versus the top-k cache
+	words = corpus(n)
+	trie = Trie2(k)
+	for word in words:
+		trie.insert(word, random.randint(0, 1000))
+	prefixes = [word[:random.randint(12, 24)] for word in random.sample(words, m)]
+	for name, method in (("sort", lambda prefix: trie.sort(prefix)[:k]),
+			("iterprefix", lambda prefix: list(trie.iterprefix(prefix, k))),
+			("complete", lambda prefix: trie.complete(prefix, k))):
+		start = time.perf_counter()
+		for prefix in prefixes:
+			method(prefix)
+		print("%-10s : %9.1f us per prefix" % (name, (time.perf_counter() - start) / m * 1e6))
+
+def freeze_benchmark(n=200000, m=100000):
+	# memory and lookup : Trie2 versus its frozen double-array form, loaded through mmap
+	words = corpus(n)
+	probes = random.sample(words, min(m, n))
+	tracemalloc.start()
+	trie = Trie2()
+	for word in words:
+		trie.insert(word)
+	memory = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	start = time.perf_counter()
+	for word in probes:
+		trie.search(word)
+	print("Trie2           : %8.1f MB, search %6.2f us" % (memory / 2**20, (time.perf_counter() - start) / len(probes) * 1e6))
+	start = time.perf_counter()
+	frozen = trie.freeze()
+	build = time.perf_counter() - start
+	with tempfile.TemporaryDirectory() as directory:
+		path = os.path.join(directory, "dat")
+		frozen.save(path)
+		with DoubleArrayTrie.load(path) as mapped:
+			for name, dat in (("frozen", frozen), ("mmap'd", mapped)):
+				start = time.perf_counter()
+				for word in probes:
+					dat.search(word)
+				search = time.perf_counter() - start
+				print("DoubleArrayTrie : %8.1f MB, search %6.2f us (%s)" % (8 * len(dat.check) / 2**20, search / len(probes) * 1e6, name))
+	print("freeze : %.2f s, %d cells for %d strings" % (build, len(frozen.check), len(frozen)))
+
+def load_benchmark(n=200000):
+	# build from a sorted word file : one insert per line versus load (insert_many)
+	words = sorted(set(corpus(n)))
+	with tempfile.TemporaryDirectory() as directory:
+		path = os.path.join(directory, "words")
+		with open(path, "w", encoding="utf-8") as f:
+			f.write("\n".join(words))
+		for cls in (Trie1, Trie2):
+			start = time.perf_counter()
+			trie = cls()
+			with open(path, encoding="utf-8") as f:
+				for word in f.read().splitlines():
+					trie.insert(word)
+			single = time.perf_counter() - start
+			del trie
+			start = time.perf_counter()
+			cls.load(path)
+			batch = time.perf_counter() - start
+			print("%s : insert %7.2f s, load %7.2f s" % (cls.__name__, single, batch))
+
+def distance(a, b):
+	# Levenshtein distance, O(|a|*|b|)
+	row = list(range(len(b) + 1))
+	for i, x in enumerate(a, 1):
+		prev = row
+		row = [i]
+		for j, y in enumerate(b, 1):
+			row.append(min(row[j - 1] + 1, prev[j] + 1, prev[j - 1] + (x != y)))
+	return row[-1]
+
+def fuzzy_benchmark(n=100000, m=20, k=2):
+	# spell check : walk the trie with pruning versus the distance to every dictionary word
+	rng = random.Random(1)
+	words = ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(4, 10))) for _ in range(n)]
+	queries = [word[:2] + "x" + word[3:] for word in rng.sample(words, m)]
+	trie = Trie2()
+	for word in words:
+		trie.insert(word)
+	start = time.perf_counter()
+	for query in queries:
+		list(trie.fuzzy(query, k))
+	walk = time.perf_counter() - start
+	start = time.perf_counter()
+	for query in queries:
+		[word for word in words if distance(word, query) <= k]
+	scan = time.perf_counter() - start
+	print("fuzzy : trie %8.2f ms, scan %8.2f ms per query" % (walk / m * 1000, scan / m * 1000))
+
+if __name__ == "__main__":
+	# Test zone
+	print("Singly linked list implementaion")
+	trie = Trie1()
+	trie.insert('cats')
+	trie.insert('cat')
+	trie.insert('dad')
+	trie.insert('')
+	trie.delete('cat')
+	trie.insert('cat')
+	trie.insert('cat')
+	trie.insert('cat')
+	trie.insert('cat')
+	trie.insert('cat')
+	trie.insert('cart')
+	trie.insert('catq')
+	trie.delete('cats')
+	trie.insert('ca')
+	print(trie.sort('cae'))
+	print(trie.sort(''))
+
+
+	print("Hash heap implementaion")
+	trie = Trie2()
+	trie.insert('cats')
+	trie.insert('cat')
+	trie.insert('dad')
+	trie.insert('')
+	trie.delete('cat')
+	trie.insert('cat')
+	trie.insert('cat')
+	trie.insert('cat')
+	trie.insert('cat')
+	trie.insert('cat')
+	trie.insert('cart')
+	trie.insert('catq')
+	trie.delete('cats')
+	trie.insert('ca')
+	print(trie.sort('cae'))
+	print(trie.sort(''))
+
+	print("Radix implementation")
+	trie = Trie3()
+	for s in ('cats', 'cat', 'dad', '', 'cart', 'catq', 'ca'):
+		trie.insert(s)
+	trie.delete('cats')
+	print(trie.sort('ca'))
+	print(trie.sort(''))
+	print(list(trie.fuzzy('cot', 1)))
+	print(list(trie.wildcard('ca*t?')))
 
-# Test zone
-print("Singly linked list implementaion")
-trie = Trie1()
-trie.insert('cats')
-trie.insert('cat')
-trie.insert('dad')
-trie.insert('')
-trie.delete('cat')
-trie.insert('cat')
-trie.insert('cat')
-trie.insert('cat')
-trie.insert('cat')
-trie.insert('cat')
-trie.insert('cart')
-trie.insert('catq')
-trie.delete('cats')
-trie.insert('ca')
-print(trie.sort('cae'))
-print(trie.sort(''))
-
-
-print("Hash heap implementaion")
-trie = Trie2()
-trie.insert('cats')
-trie.insert('cat')
-trie.insert('dad')
-trie.insert('')
-trie.delete('cat')
-trie.insert('cat')
-trie.insert('cat')
-trie.insert('cat')
-trie.insert('cat')
-trie.insert('cat')
-trie.insert('cart')
-trie.insert('catq')
-trie.delete('cats')
-trie.insert('ca')
-print(trie.sort('cae'))
-print(trie.sort(''))
+	benchmark()
+	complete_benchmark()
+	freeze_benchmark()
+	fuzzy_benchmark()
+	load_benchmark()